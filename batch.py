@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from interpreterv1 import Interpreter
+from program_cache import ProgramCache, pack_classes, unpack_classes
+from streams import CollectSink
+
+
+class RunResult:
+    def __init__(self, output, error_type=None, error=None, elapsed=0.0):
+        self.output: list = output
+        self.error_type = error_type
+        self.error: str = error
+        self.elapsed: float = elapsed
+
+    def __repr__(self):
+        return f'RunResult(output={self.output!r}, error_type={self.error_type}, elapsed={self.elapsed:.6f})'
+
+
+# class tables for the current worker process, indexed like the jobs' tables
+worker_tables = []
+
+def init_worker(packed_tables, interpreter_options):
+    global worker_tables
+    worker_tables = [None if packed is None else unpack_classes(packed) for packed in packed_tables]
+    for classes in worker_tables:
+        compile_classes(classes, interpreter_options)
+
+def run_job(job):
+    table_index, inputs, interpreter_options = job
+    return execute_classes(worker_tables[table_index], inputs, interpreter_options)
+
+# Compiles every method for the backend the jobs run on, so that a job's
+# elapsed time covers running the program and nothing done once per table
+def compile_classes(classes, interpreter_options):
+    if classes is None:
+        return
+    interpreter = Interpreter(False, program_cache=None, **interpreter_options)
+    interpreter.classes = classes
+    instrumented = interpreter.hooks is not None
+    if interpreter.backend == "vm":
+        from vm import VirtualMachine
+        machine = VirtualMachine(interpreter)
+    for class_def in classes.values():
+        for method in class_def.methods.values():
+            if interpreter.backend == "vm":
+                machine.get_code(class_def, method)
+            else:
+                class_def.get_body(method, classes, instrumented)
+
+def execute_classes(classes, inputs, interpreter_options):
+    sink = CollectSink()
+    # with no input left a job's inputi fails with a TYPE_ERROR; an empty list
+    # would make InterpreterBase read stdin instead
+    inputs = iter(inputs or ())
+    interpreter = Interpreter(False, inputs, program_cache=None, output_sink=sink, **interpreter_options)
+    start = time.perf_counter()
+    try:
+        if classes is not None:
+            interpreter.execute(classes)
+    except Exception as exception:
+        error_type, _ = interpreter.get_error_type_and_line()
+        if error_type is None:
+            error_type = type(exception).__name__
+        return RunResult(sink.get_output(), error_type, str(exception), time.perf_counter() - start)
+    return RunResult(sink.get_output(), elapsed=time.perf_counter() - start)
+
+
+def load_tables(programs, interpreter_options):
+    # each distinct program is parsed once; a program that fails to load is
+    # reported as the result of every job that uses it
+    cache = ProgramCache(max_entries=len(programs) or 1)
+    loader = Interpreter(False, program_cache=cache, **interpreter_options)
+    tables = []
+    load_errors = []
+    table_by_key = {}
+    for program in programs:
+        key = cache.key(program)
+        if key not in table_by_key:
+            try:
+                tables.append(loader.load_program(program))
+                load_errors.append(None)
+            except Exception as exception:
+                error_type, _ = loader.get_error_type_and_line()
+                tables.append(None)
+                load_errors.append(RunResult([], error_type or type(exception).__name__, str(exception)))
+            table_by_key[key] = len(tables) - 1
+    return tables, load_errors, [table_by_key[cache.key(program)] for program in programs]
+
+
+def run_batch(programs, inputs=None, max_workers=None, chunksize=1, **interpreter_options):
+    if inputs is None:
+        inputs = [None] * len(programs)
+    if len(inputs) != len(programs):
+        raise ValueError('programs and inputs must have the same length')
+
+    tables, load_errors, table_indexes = load_tables(programs, interpreter_options)
+    jobs = [(table_index, job_inputs, interpreter_options) for table_index, job_inputs in zip(table_indexes, inputs)]
+
+    runnable = [job for job in jobs if load_errors[job[0]] is None]
+    if max_workers == 0:
+        for table in tables:
+            compile_classes(table, interpreter_options)
+        finished = iter([execute_classes(tables[table_index], job_inputs, options) for table_index, job_inputs, options in runnable])
+    else:
+        packed_tables = [None if table is None else pack_classes(table) for table in tables]
+        with ProcessPoolExecutor(max_workers, initializer=init_worker,
+                                 initargs=(packed_tables, interpreter_options)) as executor:
+            finished = iter(list(executor.map(run_job, runnable, chunksize=chunksize)))
+    return [load_errors[job[0]] or next(finished) for job in jobs]
+
+
+def run_program_batch(program, input_sets, max_workers=None, chunksize=1, **interpreter_options):
+    return run_batch([program] * len(input_sets), input_sets, max_workers, chunksize, **interpreter_options)
@@ -0,0 +1,139 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interpreterv1 import Interpreter
+from profiler import Collector
+from streams import CollectSink
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class CountingCollector(Collector):
+    def __init__(self):
+        self.statements = 0
+        self.calls = 0
+
+    def method_called(self, class_name, method_name):
+        self.calls += 1
+
+    def statement_executed(self, location):
+        self.statements += 1
+
+
+def read_program(path):
+    with open(path) as program_file:
+        return program_file.read().split("\n")
+
+def new_interpreter(backend, **options):
+    return Interpreter(False, backend=backend, program_cache=None, output_sink=CollectSink(), **options)
+
+
+def run_benchmark(program, backend, repeat):
+    # statement and call counts come from an instrumented run and peak memory
+    # from a traced one, so neither slows down the timed runs
+    counter = CountingCollector()
+    new_interpreter(backend, collectors=[counter]).run(program)
+
+    tracemalloc.start()
+    new_interpreter(backend).run(program)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    parse_times = []
+    run_times = []
+    for _ in range(repeat):
+        interpreter = new_interpreter(backend)
+        start = time.perf_counter()
+        classes = interpreter.load_program(program)
+        parsed = time.perf_counter()
+        interpreter.execute(classes)
+        finished = time.perf_counter()
+        parse_times.append(parsed - start)
+        run_times.append(finished - parsed)
+
+    run_time = min(run_times)
+    return {
+        'parse_time': min(parse_times),
+        'run_time': run_time,
+        'statements': counter.statements,
+        'calls': counter.calls,
+        'statements_per_second': counter.statements / run_time if run_time else None,
+        'calls_per_second': counter.calls / run_time if run_time else None,
+        'peak_memory': peak_memory,
+    }
+
+
+def run_benchmarks(paths, backends, repeat):
+    results = {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        program = read_program(path)
+        for backend in backends:
+            results[f'{name}/{backend}'] = run_benchmark(program, backend, repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    # returns the names whose run time grew by more than threshold
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['run_time'] / baseline[name]['run_time']
+        status = 'SLOWER' if ratio > 1 + threshold else 'ok'
+        print(f'{name:<28} {baseline[name]["run_time"]:9.4f}s -> {result["run_time"]:9.4f}s  x{ratio:5.2f}  {status}')
+        if status != 'ok':
+            regressions.append(name)
+    return regressions
+
+
+def print_results(results):
+    print(f'{"benchmark":<28} {"parse":>9} {"run":>9} {"stmts/s":>12} {"calls/s":>12} {"peak KiB":>10}')
+    for name, result in results.items():
+        statements_per_second = result['statements_per_second'] or 0
+        calls_per_second = result['calls_per_second'] or 0
+        print(f'{name:<28} {result["parse_time"]:9.4f} {result["run_time"]:9.4f} '
+              f'{statements_per_second:12.0f} {calls_per_second:12.0f} {result["peak_memory"] / 1024:10.1f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the Brewin interpreter benchmarks.')
+    parser.add_argument('names', nargs='*', help='benchmarks to run, default all')
+    parser.add_argument('--backend', choices=Interpreter.BACKENDS + ('all',), default='all')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark, the best is kept')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results saved by an earlier --output')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+
+    paths = sorted(glob.glob(os.path.join(BENCHMARK_DIR, '*.br')))
+    if args.names:
+        paths = [path for path in paths if os.path.splitext(os.path.basename(path))[0] in args.names]
+    backends = Interpreter.BACKENDS if args.backend == 'all' else (args.backend,)
+
+    # the tree backend recurses in Python for every Brewin call
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))
+    results = run_benchmarks(paths, backends, args.repeat)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({'python': sys.version.split()[0], 'results': results}, output_file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        print()
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
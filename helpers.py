@@ -42,8 +42,101 @@ def is_a_begin_statement(statement: list):
 def is_a_set_statement(statement: list):
     return statement[0] == InterpreterBase.SET_DEF
 
+# the lengths a statement may have, counting its keyword; None means no upper
+# bound. while keeps its own check, which reports a TYPE_ERROR
+STATEMENT_LENGTHS = {
+    InterpreterBase.SET_DEF: (3, 3),
+    InterpreterBase.INPUT_INT_DEF: (2, 2),
+    InterpreterBase.INPUT_STRING_DEF: (2, 2),
+    InterpreterBase.IF_DEF: (3, 4),
+    InterpreterBase.RETURN_DEF: (1, 2),
+    InterpreterBase.CALL_DEF: (3, None),
+}
 
+def has_valid_length(statement: list):
+    if type(statement) != list or statement == []:
+        return False
+    if type(statement[0]) == list or statement[0] not in STATEMENT_LENGTHS:
+        return True
+    shortest, longest = STATEMENT_LENGTHS[statement[0]]
+    return len(statement) >= shortest and (longest is None or len(statement) <= longest)
+
+def may_return(statement):
+    if type(statement) != list or statement == []:
+        return False
+    if is_a_return_statement(statement):
+        return True
+    if is_a_begin_statement(statement):
+        return any(may_return(substatement) for substatement in statement[1:])
+    if is_an_if_statement(statement) or is_a_while_statement(statement):
+        return any(may_return(substatement) for substatement in statement[2:])
+    return False
+
+# splits a begin's statements after every one that may return, since the
+# statements that follow it then only run if it didn't
+def statement_segments(statements):
+    segments = [[]]
+    for statement in statements:
+        if segments[-1] and may_return(segments[-1][-1]):
+            segments.append([])
+        segments[-1].append(statement)
+    return segments
+
+def segment_weight(segment):
+    return sum(statement_weight(statement) for statement in segment)
+
+# Statements are charged against the step limit before they run: the ones a
+# statement is sure to execute are its weight, while the branch an if takes,
+# each iteration of a while and the later segments of a begin are charged
+# when execution reaches them, so only statements that run are counted
+def statement_weight(statement):
+    if type(statement) == list and statement != [] and is_a_begin_statement(statement):
+        return 1 + segment_weight(statement_segments(statement[1:])[0])
+    return 1
 
+# The parser's tokens need their line number passed to __new__, which pickle
+# doesn't do, so pickled statements hold LineTokens instead
+class LineToken(str):
+    def __new__(cls, value, line_num):
+        token = str.__new__(cls, value)
+        token.line_num = line_num
+        return token
 
-        
-        
\ No newline at end of file
+    def __reduce__(self):
+        return (LineToken, (str(self), self.line_num))
+
+def picklable_tokens(statement):
+    if type(statement) == list:
+        return [picklable_tokens(item) for item in statement]
+    if isinstance(statement, str):
+        line_num = getattr(statement, 'line_num', None)
+        return str(statement) if line_num is None else LineToken(statement, line_num)
+    return statement
+
+
+# int(a / b) goes through a float, which loses precision and overflows for
+# large operands; this truncates toward zero the same way using integers only
+def truncating_divide(a, b):
+    quotient = abs(a) // abs(b)
+    return -quotient if (a < 0) != (b < 0) else quotient
+
+# str() and int() refuse numbers longer than sys.get_int_max_str_digits(), so
+# longer ones are converted in halves
+MAX_DIRECT_DIGITS = 4000
+
+def int_to_string(n):
+    if n < 0:
+        return "-" + int_to_string(-n)
+    if n.bit_length() < MAX_DIRECT_DIGITS * 3:
+        return str(n)
+    low_digits = int(n.bit_length() * 0.30103) // 2
+    high, low = divmod(n, 10 ** low_digits)
+    return int_to_string(high) + int_to_string(low).zfill(low_digits)
+
+def string_to_int(s):
+    if len(s) <= MAX_DIRECT_DIGITS:
+        return int(s)
+    if s[0] in ('-', '+'):
+        return -string_to_int(s[1:]) if s[0] == '-' else string_to_int(s[1:])
+    low_digits = len(s) // 2
+    return string_to_int(s[:-low_digits]) * 10 ** low_digits + string_to_int(s[-low_digits:])
@@ -1,37 +1,324 @@
 from intbase import InterpreterBase, ErrorType
 from bparser import BParser
 from helpers import *
-from typing import Union
+from program_cache import ProgramCache
+from profiler import CollectorGroup, Profiler, TraceCollector
+from ropes import concatenate
+import sys
+import time
+
+# how many statements may run between two checks of the wall-clock limit
+LIMIT_CHECK_INTERVAL = 10000
+# how many statements run_async runs before letting other tasks run
+YIELD_INTERVAL = 1000
+
+class ExecutionLimitError(Exception):
+    pass
+
+class StepLimitError(ExecutionLimitError):
+    pass
+
+class CallDepthLimitError(ExecutionLimitError):
+    pass
+
+class TimeLimitError(ExecutionLimitError):
+    pass
+
+class HeapLimitError(ExecutionLimitError):
+    pass
+
+
+# Live and peak object counts and bytes per class. Only objects allocated while
+# an interpreter tracks its heap are counted; they report back here when freed.
+# An object's bytes include the values in its fields, see TrackedObject, and a
+# string concatenation is refused if its result alone would not fit.
+class HeapStats:
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.live_bytes = 0
+        self.peak_bytes = 0
+        self.classes = {}
+
+    def allocated(self, class_name, size):
+        if self.max_bytes is not None and self.live_bytes + size > self.max_bytes:
+            raise HeapLimitError(f'allocating {class_name} would exceed the {self.max_bytes} byte heap limit')
+        if class_name not in self.classes:
+            self.classes[class_name] = {'live': 0, 'peak': 0, 'bytes': 0, 'peak_bytes': 0, 'allocated': 0}
+        stats = self.classes[class_name]
+        stats['live'] += 1
+        stats['allocated'] += 1
+        stats['bytes'] += size
+        stats['peak'] = max(stats['peak'], stats['live'])
+        stats['peak_bytes'] = max(stats['peak_bytes'], stats['bytes'])
+        self.live_bytes += size
+        self.peak_bytes = max(self.peak_bytes, self.live_bytes)
+
+    def resized(self, class_name, change):
+        if change > 0 and self.max_bytes is not None and self.live_bytes + change > self.max_bytes:
+            raise HeapLimitError(f'storing into a {class_name} field would exceed the {self.max_bytes} byte heap limit')
+        stats = self.classes[class_name]
+        stats['bytes'] += change
+        stats['peak_bytes'] = max(stats['peak_bytes'], stats['bytes'])
+        self.live_bytes += change
+        self.peak_bytes = max(self.peak_bytes, self.live_bytes)
+
+    def ensure_room(self, size):
+        if self.max_bytes is not None and self.live_bytes + size > self.max_bytes:
+            raise HeapLimitError(f'a {size} byte string would exceed the {self.max_bytes} byte heap limit')
+
+    def freed(self, class_name, size):
+        stats = self.classes[class_name]
+        stats['live'] -= 1
+        stats['bytes'] -= size
+        self.live_bytes -= size
+
+    def report(self):
+        return {
+            'live_bytes': self.live_bytes,
+            'peak_bytes': self.peak_bytes,
+            'classes': {class_name: dict(stats) for class_name, stats in self.classes.items()},
+        }
 
 def convert_string_to_native_val(s):
     if check_int(s): 
-        return True, Value(str(int(s)), int)
+        return True, Value(string_to_int(s), int)
     elif check_string(s):
         return True, Value(s[1:-1], str)
     elif check_bool(s):
         if s == InterpreterBase.TRUE_DEF:
-            return True, Value(InterpreterBase.TRUE_DEF, bool)
-        return True, Value(InterpreterBase.FALSE_DEF, bool)
+            return True, TRUE_VALUE
+        return True, FALSE_VALUE
     elif check_null(s):
-        return True, Value(InterpreterBase.NULL_DEF, None)
+        return True, NULL_VALUE
     else:
-        return False, Value(str(None), None)
+        return False, NULL_VALUE
     
     
+DEFAULT_PROGRAM_CACHE = ProgramCache()
+
 class Interpreter(InterpreterBase):
-    def __init__(self, console_output=True, inp=None, trace_output=False):
+    BACKENDS = ("tree", "vm")
+
+    def __init__(self, console_output=True, inp=None, trace_output=False, backend="tree",
+                 program_cache=DEFAULT_PROGRAM_CACHE, output_sink=None,
+                 max_steps=None, max_call_depth=None, max_time=None, profile=False, collectors=None,
+                 track_heap=False, max_heap=None, compact_heap=False, validate=False):
+        if backend not in Interpreter.BACKENDS:
+            raise ValueError(f'unknown backend {backend}')
         self.classes = {}
+        self.backend = backend
+        self.program_cache = program_cache
+        self.output_sink = output_sink
+        self.max_steps = max_steps
+        self.max_call_depth = max_call_depth
+        self.max_time = max_time
+        self.track_heap = track_heap or max_heap is not None
+        self.max_heap = max_heap
+        self.compact_heap = compact_heap
+        # Brewin reports errors when the code that has them runs; validate
+        # reports the ones that do not depend on any value before running
+        self.validate = validate
+        self.yield_interval = None
+        self.__reset_limits()
+        # hooks is None unless something is collecting, in which case methods
+        # run an instrumented compile that reports to it
+        self.profiler = Profiler() if profile else None
+        collectors = list(collectors or [])
+        if self.profiler is not None:
+            collectors.append(self.profiler)
+        if trace_output:
+            collectors.append(TraceCollector())
+        self.hooks = None
+        if len(collectors) == 1:
+            self.hooks = collectors[0]
+        elif collectors:
+            self.hooks = CollectorGroup(collectors)
+        # lists keep the InterpreterBase behaviour; any other iterable, such as
+        # a generator or an open file, is read one line at a time
+        self.input_lines = None
+        if inp is not None and type(inp) not in (list, tuple):
+            self.input_lines = iter(inp)
+            inp = None
         super().__init__(console_output, inp)
 
-    def run(self, program):
-        result, parsed_program = BParser.parse(program)
-        if result == False:
+    def get_input(self):
+        if self.input_lines is None:
+            return super().get_input()
+        line = next(self.input_lines, None)
+        if line is None:
+            return None
+        return line.rstrip("\r\n")
+
+    # Statements subtract their statement_weight from fuel before they run and
+    # call refuel once it drops below zero, so the limits cost one subtraction
+    # and one comparison per call, loop iteration or branch taken.
+    def __reset_limits(self):
+        self.steps_used = 0
+        self.call_depth = 0
+        self.call_depth_limit = float('inf') if self.max_call_depth is None else self.max_call_depth
+        self.deadline = None if self.max_time is None else time.monotonic() + self.max_time
+        self.fuel_granted = self.__next_fuel_grant()
+        self.fuel = self.fuel_granted
+        self.heap = HeapStats(self.max_heap) if self.track_heap else None
+
+    def __next_fuel_grant(self):
+        grant = float('inf') if self.deadline is None else LIMIT_CHECK_INTERVAL
+        if self.yield_interval is not None:
+            grant = min(grant, self.yield_interval)
+        if self.max_steps is not None:
+            grant = min(grant, self.max_steps - self.steps_used)
+        return grant
+
+    def refuel(self):
+        self.steps_used += self.fuel_granted - self.fuel
+        if self.max_steps is not None and self.steps_used > self.max_steps:
+            raise StepLimitError(f'exceeded the limit of {self.max_steps} statements')
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise TimeLimitError(f'running time exceeded {self.max_time} seconds')
+        self.fuel_granted = self.__next_fuel_grant()
+        self.fuel = self.fuel_granted
+
+    def get_heap_stats(self):
+        if self.heap is None:
+            return None
+        return self.heap.report()
+
+    def get_profile(self):
+        if self.profiler is None:
+            return None
+        return self.profiler.report()
+
+    def call_depth_exceeded(self):
+        raise CallDepthLimitError(f'call depth exceeded {self.max_call_depth}')
+
+    # input_stream is an async iterator of lines or has an async readline(),
+    # like asyncio.StreamReader; without one input comes from get_input
+    async def get_input_async(self, input_stream=None):
+        if input_stream is None:
+            return self.get_input()
+        if hasattr(input_stream, 'readline'):
+            line = await input_stream.readline()
+            if not line:
+                return None
+            if type(line) == bytes:
+                line = line.decode()
+        else:
+            try:
+                line = await input_stream.__anext__()
+            except StopAsyncIteration:
+                return None
+        return line.rstrip("\r\n")
+
+    def read_int_input(self):
+        return self.parse_int_input(self.get_input())
+
+    def read_string_input(self):
+        return self.parse_string_input(self.get_input())
+
+    def parse_int_input(self, user_input):
+        if not user_input or not check_int(user_input):
+            self.error(ErrorType.TYPE_ERROR, f'{user_input} is not an integer')
+        return Value(string_to_int(user_input), int)
+
+    def parse_string_input(self, user_input):
+        if user_input is None:
+            self.error(ErrorType.TYPE_ERROR, 'no more input')
+        return Value(user_input, str)
+
+    def output(self, v):
+        if self.output_sink is None:
+            super().output(v)
+        else:
+            self.output_sink.write(v)
+
+    def run(self, program, backend=None):
+        classes = self.load_program(program)
+        if classes is None:
             return
-        
-        self.__discover_all_classes_and_track_them(parsed_program)
+        self.execute(classes, backend)
+
+    def load_program(self, program):
+        key = None
+        classes = None
+        if self.program_cache is not None:
+            key = self.program_cache.key(program)
+            if self.compact_heap:
+                key += ".compact"
+            classes = self.program_cache.get(key)
+
+        if classes is None:
+            result, parsed_program = BParser.parse(program)
+            if result == False:
+                return None
+            classes = self.__discover_all_classes_and_track_them(parsed_program)
+            if key is not None:
+                self.program_cache.put(key, classes)
+        if self.validate:
+            ProgramValidator(self, classes).validate()
+        return classes
+
+    def execute(self, classes, backend=None):
+        if backend is None:
+            backend = self.backend
+        elif backend not in Interpreter.BACKENDS:
+            raise ValueError(f'unknown backend {backend}')
+        self.classes = classes
+        self.__reset_limits()
         class_def = self.__find_definition_for_class(InterpreterBase.MAIN_CLASS_DEF)
-        obj = class_def.instantiate_object() 
-        obj.run_method(InterpreterBase.MAIN_FUNC_DEF)
+        self.__check_main_method(class_def)
+        self.__charge_main_method(class_def)
+        obj = class_def.instantiate_object(self) 
+        try:
+            if backend == "vm":
+                from vm import VirtualMachine
+                VirtualMachine(self).run_method(obj, InterpreterBase.MAIN_FUNC_DEF)
+            else:
+                obj.run_method(InterpreterBase.MAIN_FUNC_DEF)
+        finally:
+            if self.output_sink is not None:
+                self.output_sink.flush()
+
+    # Runs on the vm backend, letting other tasks run every yield_interval
+    # statements. Output goes to output_sink, whose write and flush are
+    # coroutines, or to this interpreter's own output when it is None.
+    async def run_async(self, program, input_stream=None, output_sink=None, yield_interval=YIELD_INTERVAL):
+        classes = self.load_program(program)
+        if classes is None:
+            return
+        await self.execute_async(classes, input_stream, output_sink, yield_interval)
+
+    async def execute_async(self, classes, input_stream=None, output_sink=None, yield_interval=YIELD_INTERVAL):
+        from vm import VirtualMachine
+        self.classes = classes
+        self.yield_interval = yield_interval
+        self.__reset_limits()
+        try:
+            class_def = self.__find_definition_for_class(InterpreterBase.MAIN_CLASS_DEF)
+            self.__check_main_method(class_def)
+            self.__charge_main_method(class_def)
+            obj = class_def.instantiate_object(self)
+            await VirtualMachine(self, cooperative=True).run_method_async(obj, InterpreterBase.MAIN_FUNC_DEF,
+                                                                          input_stream, output_sink)
+        finally:
+            self.yield_interval = None
+            if output_sink is not None:
+                await output_sink.flush()
+            if self.output_sink is not None:
+                self.output_sink.flush()
+
+    # main is run without arguments, so it may not declare any parameters
+    def __check_main_method(self, class_def):
+        method = class_def.methods.get(InterpreterBase.MAIN_FUNC_DEF)
+        if method is not None and method.parameters:
+            super().error(ErrorType.NAME_ERROR, f'{InterpreterBase.MAIN_FUNC_DEF} takes no parameters')
+
+    # every other method's weight is charged by the call that runs it
+    def __charge_main_method(self, class_def):
+        method = class_def.methods.get(InterpreterBase.MAIN_FUNC_DEF)
+        if method is not None:
+            self.fuel -= method.weight
+            if self.fuel < 0:
+                self.refuel()
 
     def __find_definition_for_class(self, class_name):
         if class_name in self.classes:
@@ -39,10 +326,11 @@ class Interpreter(InterpreterBase):
         super().error(ErrorType.NAME_ERROR)
 
     def __discover_all_classes_and_track_them(self, parsed_program):
+         classes = {}
          for class_def in parsed_program:
             class_name = class_def[1] 
-            c_def = ClassDefinition(class_name, self)
-            if class_name in self.classes:
+            c_def = ClassDefinition(class_name, self.compact_heap)
+            if class_name in classes:
                 super().error(ErrorType.TYPE_ERROR)
             for item in class_def:
                 if item[0] == InterpreterBase.FIELD_DEF:
@@ -54,42 +342,79 @@ class Interpreter(InterpreterBase):
                         super().error(ErrorType.TYPE_ERROR)
                     c_def.add_field(name, value)
 
-                elif item[0] == InterpreterBase.METHOD_DEF:
+            # methods are compiled against the complete set of fields
+            for item in class_def:
+                if item[0] == InterpreterBase.METHOD_DEF:
                     name, parameters, statement = item[1:]
                     if name in c_def.methods:
                         super().error(ErrorType.NAME_ERROR)
                     c_def.add_method(name, parameters, statement)
 
-            self.classes[class_name] = c_def
+            classes[class_name] = c_def
+         return classes
 
 class Value:
+    __slots__ = ('val', 'type')
+
     def __init__(self, val, type):
         self.val = val
         self.type = type
 
+    # string values may hold a StringRope, see ropes.py
     def get_pythonic_val(self):
-        if self.type == int:
-            return int(self.val)
-        elif self.type == str:
-            return self.val
-        elif self.type == bool:
-            if self.val == InterpreterBase.TRUE_DEF:
-                return True
-            return False
+        if self.type == str:
+            return str(self.val)
+        return self.val
+
+    def to_brewin_string(self):
+        if self.type == bool:
+            return InterpreterBase.TRUE_DEF if self.val else InterpreterBase.FALSE_DEF
         elif self.type == None:
-            return None
+            return InterpreterBase.NULL_DEF
+        elif self.type == int:
+            return int_to_string(self.val)
+        return str(self.val)
+
+TRUE_VALUE = Value(True, bool)
+FALSE_VALUE = Value(False, bool)
+NULL_VALUE = Value(None, None)
+
+def bool_value(b):
+    return TRUE_VALUE if b else FALSE_VALUE
+
+VALUE_SIZE = sys.getsizeof(NULL_VALUE)
+
+# bytes a field holding value accounts for: objects are counted on their own
+# and the interned constants are shared, so both count as nothing
+def value_size(value):
+    if type(value) is int:
+        return sys.getsizeof(value)
+    if type(value) is not Value or value is TRUE_VALUE or value is FALSE_VALUE or value is NULL_VALUE:
+        return 0
+    if value.type is str:
+        if type(value.val) is str:
+            return VALUE_SIZE + sys.getsizeof(value.val)
+        return VALUE_SIZE + sys.getsizeof(value.val) + sys.getsizeof("") + len(value.val)
+    return VALUE_SIZE + sys.getsizeof(value.val)
     
 class Field:
-    def __init__(self, name, value):
+    def __init__(self, name, value, index):
         self.name = name
         self.initial_value: Value = value
-        self.value :  Union[Value, ObjectDefinition] = value
+        self.index: int = index
 
 class Method:
     def __init__(self, name, parameters, statement):
         self.name = name
         self.parameters: list = parameters
-        self.statement: list = statement
+        self.parameter_slots = {name: index for index, name in enumerate(parameters)}
+        self.source: list = statement
+        self.statement: list = StatementOptimizer().optimize_statement(statement)
+        self.weight = statement_weight(self.statement)
+        self.body = None
+        self.code = None
+        self.instrumented_body = None
+        self.instrumented_code = None
 
     def get_top_level_statement(self) -> list:
         return self.statement
@@ -98,335 +423,841 @@ class Method:
         return self.parameters
 
 
+# Objects of a compact class keep int field values unwrapped and box them in a
+# Value again when the field is read, trading some speed for memory.
 class ClassDefinition:
-    def __init__(self, name, interpreter):
-        self.interpreter = interpreter
+    def __init__(self, name, compact=False):
         self.name = name
+        self.compact = compact
         self.methods = {}
         self.fields = {}
+        self.field_template = []
+        self.object_size = None
+        self.validated = False
 
     def add_field(self, name, val):
-        self.fields[name] = Field(name, val)
+        self.fields[name] = Field(name, val, len(self.fields))
+        self.field_template.append(val.val if self.compact and val.type == int else val)
+
+    def add_method(self, name, parameters, statement):
+        self.methods[name] = Method(name, parameters, statement)
 
-    def add_method(self, name,  statement, parameters = [],):
-        self.methods[name] = Method(name, statement, parameters)
+    # methods are compiled the first time they run, against the complete
+    # class table, so calls on me and new resolve their targets up front
+    def get_body(self, method, classes, instrumented=False):
+        if not instrumented:
+            if method.body is None:
+                method.body = StatementCompiler(self, method, classes).compile_method(method.statement)
+            return method.body
+        if method.instrumented_body is None:
+            method.instrumented_body = StatementCompiler(self, method, classes, instrumented=True).compile_method(method.statement)
+        return method.instrumented_body
 
-    def instantiate_object(self):
-        obj = ObjectDefinition(self.interpreter)
-        for method in self.methods.values():
-            obj.add_method(method)
-        for field in self.fields.values():
-            obj.add_field(field)
+    def instantiate_object(self, interpreter):
+        if interpreter.hooks is not None:
+            interpreter.hooks.object_allocated(self.name)
+        if interpreter.heap is not None:
+            return self.__instantiate_tracked_object(interpreter)
+        obj = ObjectDefinition(self.field_template)
+        obj.interpreter = interpreter
+        obj.class_def = self
         return obj
 
-class ObjectDefinition:
-    def __init__(self, interpreter: Interpreter):
-        self.interpreter = interpreter
-        self.fields = {}
-        self.methods = {}
+    def __instantiate_tracked_object(self, interpreter):
+        # sized as an untracked object, leaving out the tracking slots themselves
+        if self.object_size is None:
+            self.object_size = (sys.getsizeof(ObjectDefinition(self.field_template))
+                                + sum(value_size(value) for value in self.field_template))
+        interpreter.heap.allocated(self.name, self.object_size)
+        obj = TrackedObject(self.field_template)
+        obj.interpreter = interpreter
+        obj.class_def = self
+        obj.heap = interpreter.heap
+        obj.size = self.object_size
+        return obj
+
+    # compiled code is not picklable, so only the source of each method is
+    # kept and the class is recompiled when it is loaded
+    def __getstate__(self):
+        return {
+            'name': picklable_tokens(self.name),
+            'compact': self.compact,
+            'fields': [(picklable_tokens(field.name), field.initial_value) for field in self.fields.values()],
+            'methods': [picklable_tokens([method.name, method.parameters, method.source])
+                        for method in self.methods.values()],
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state['name'], state['compact'])
+        for name, value in state['fields']:
+            self.add_field(name, value)
+        for name, parameters, statement in state['methods']:
+            self.add_method(name, parameters, statement)
 
-    def add_method(self, method: Method):
-        self.methods[method.name] = method
+# An object is the list of its field values, indexed like the class's
+# field_template, so it needs no separate field storage. Objects compare and
+# hash by identity, never by their fields.
+class ObjectDefinition(list):
+    __slots__ = ('interpreter', 'class_def')
 
-    def add_field(self, field: Field):
-        self.fields[field.name] = field
+    __eq__ = object.__eq__
+    __ne__ = object.__ne__
+    __hash__ = object.__hash__
 
     def __find_method(self, method_name) -> Method:
-        if method_name in self.methods:
-            return self.methods[method_name]
+        if method_name in self.class_def.methods:
+            return self.class_def.methods[method_name]
         self.interpreter.error(ErrorType.NAME_ERROR)
 
-    def run_method(self, method_name, parameters = {}):
+    def run_method(self, method_name, parameters = []):
         method = self.__find_method(method_name)
-        statement = method.get_top_level_statement()
-        result, _ = self.__run_statement(statement, parameters)
+        body = self.class_def.get_body(method, self.interpreter.classes, self.interpreter.hooks is not None)
+        result = body(self, parameters)
+        if result is None:
+            return NULL_VALUE
         return result
-    
-    def convert_value(self, s, parameters = {}):
-        if type(s) == Value or type(s) == ObjectDefinition:
-            return s
-        convert_success, value= convert_string_to_native_val(s) 
-        if convert_success != False:
-            return value
-        if s in parameters:
-            return parameters[s]
-        if s in self.fields:
-            return self.fields[s].value
-        if s in self.interpreter.classes:
-            return self.interpreter.classes[s]
-        self.interpreter.error(ErrorType.NAME_ERROR, f'{s} is not defined')
-
-    def __solve_expression(self, expression, parameters = {}):
+
+# Field stores on a tracked object go through __setitem__, which charges the
+# heap for the size of the new value; untracked objects skip this entirely.
+class TrackedObject(ObjectDefinition):
+    __slots__ = ('heap', 'size')
+
+    def __setitem__(self, index, value):
+        change = value_size(value) - value_size(self[index])
+        if change:
+            self.heap.resized(self.class_def.name, change)
+            self.size += change
+        list.__setitem__(self, index, value)
+
+    def __del__(self):
+        self.heap.freed(self.class_def.name, self.size)
+
+
+def add_values(interpreter, op1, op2):
+    if (op1.type == int and op2.type == int):
+        return Value(op1.val + op2.val, int)
+    elif (op1.type == str and op2.type == str):
+        if interpreter.heap is not None:
+            interpreter.heap.ensure_room(len(op1.val) + len(op2.val))
+        return Value(concatenate(op1.val, op2.val), str)
+    interpreter.error(ErrorType.TYPE_ERROR, description = f'+ operator not supported between {op1.type} and {op2.type}')
+
+def integer_operation(operator, compute):
+    def evaluate(interpreter, op1, op2):
+        if (op1.type == int and op2.type == int):
+            return Value(compute(op1.val, op2.val), int)
+        interpreter.error(ErrorType.TYPE_ERROR, description = f'{operator} operator not supported between {op1.type} and {op2.type}')
+    return evaluate
+
+def comparison_operation(operator, compare):
+    def evaluate(interpreter, op1, op2):
+        if (op1.type == int and op2.type == int):
+            return bool_value(compare(op1.val, op2.val))
+        if (op1.type == str and op2.type == str):
+            return bool_value(compare(str(op1.val), str(op2.val)))
+        interpreter.error(ErrorType.TYPE_ERROR, description = f'{operator} operator not supported between {op1.type} and {op2.type}')
+    return evaluate
+
+def boolean_operation(operator, compute):
+    def evaluate(interpreter, op1, op2):
+        if (op1.type == bool and op2.type == bool):
+            return bool_value(compute(op1.val, op2.val))
+        interpreter.error(ErrorType.TYPE_ERROR, description = f'{operator} operator not supported between {op1.type} and {op2.type}')
+    return evaluate
+
+def equality_operation(operator, compare):
+    def evaluate(interpreter, op1, op2):
+        if isinstance(op1, ObjectDefinition) or isinstance(op2, ObjectDefinition):
+            if isinstance(op1, ObjectDefinition) and isinstance(op2, ObjectDefinition):
+                return bool_value(compare(op1 is op2, True))
+            other = op2 if isinstance(op1, ObjectDefinition) else op1
+            if other.type != None:
+                interpreter.error(ErrorType.TYPE_ERROR)
+            return bool_value(compare(False, True))
+        if (op1.type == op2.type):
+            if op1.type == str:
+                return bool_value(compare(str(op1.val), str(op2.val)))
+            return bool_value(compare(op1.val, op2.val))
+        interpreter.error(ErrorType.TYPE_ERROR, description = f'{operator} operator not supported between {op1.type} and {op2.type}')
+    return evaluate
+
+BINARY_OPERATIONS = {
+    "+": add_values,
+    "-": integer_operation("-", lambda a, b: a - b),
+    "*": integer_operation("*", lambda a, b: a * b),
+    "/": integer_operation("/", truncating_divide),
+    "%": integer_operation("%", lambda a, b: a % b),
+    ">": comparison_operation(">", lambda a, b: a > b),
+    "<": comparison_operation("<", lambda a, b: a < b),
+    "<=": comparison_operation("<=", lambda a, b: a <= b),
+    ">=": comparison_operation(">=", lambda a, b: a >= b),
+    "!=": equality_operation("!=", lambda a, b: a != b),
+    "==": equality_operation("==", lambda a, b: a == b),
+    "&": boolean_operation("&", lambda a, b: a & b),
+    "|": boolean_operation("|", lambda a, b: a | b),
+}
+
+
+class NotFoldable(Exception):
+    pass
+
+# stands in for the interpreter while folding, so that an operation which
+# would fail at runtime is left in place to fail at runtime
+class FoldingInterpreter:
+    heap = None
+
+    def error(self, error_type, description=None, line_num=None):
+        raise NotFoldable()
+
+FOLDING_INTERPRETER = FoldingInterpreter()
+
+def constant_value(expression):
+    if type(expression) == Value:
+        return expression
+    if type(expression) == list or expression == InterpreterBase.ME_DEF:
+        return None
+    convert_success, value = convert_string_to_native_val(expression)
+    return value if convert_success else None
+
+def always_returns(statement):
+    if type(statement) != list or statement == []:
+        return False
+    if is_a_return_statement(statement):
+        return True
+    if is_a_begin_statement(statement):
+        return any(always_returns(substatement) for substatement in statement[1:])
+    if is_an_if_statement(statement) and len(statement) == 4:
+        return always_returns(statement[2]) and always_returns(statement[3])
+    return False
+
+
+# Rewrites a method body once before it is compiled: constant subexpressions
+# become Values, an if with a constant condition becomes the branch it takes,
+# and a begin drops the statements after one that always returns.
+class StatementOptimizer:
+    def optimize_statement(self, statement):
+        optimized = self.__optimize_statement(statement)
+        if optimized is None:
+            return [InterpreterBase.BEGIN_DEF]
+        return optimized
+
+    def fold_expression(self, expression):
         if type(expression) != list:
-            return self.convert_value(expression, parameters)
-        
+            return expression
+
         if len(expression) == 1:
-            if type(expression[0]) == list:
-                expression[0] = self.__solve_expression(expression[0])
-            return self.convert_value(expression[0], parameters)
-        
+            operand = self.fold_expression(expression[0])
+            return operand if type(operand) == Value else [operand]
+
         elif len(expression) == 2:
             operator, op1 = expression
-            
-            if type(op1) == list:
-                op1 = self.__solve_expression(op1)
-
             if operator == "!":
-                op1 = self.convert_value(op1, parameters)
-                if type(op1) != Value:
-                    self.interpreter.error(ErrorType.TYPE_ERROR)
-                if op1.type == bool:
-                    return Value(str(not op1.get_pythonic_val()).lower(), bool)
-                
-            if operator == InterpreterBase.NEW_DEF:
-                if op1 not in self.interpreter.classes:
-                    self.interpreter.error(ErrorType.TYPE_ERROR)
-                op1 = self.convert_value(op1, parameters)
-                return op1.instantiate_object()
-            
-            
+                operand = self.fold_expression(op1)
+                value = constant_value(operand)
+                if value is not None and value.type == bool:
+                    return bool_value(not value.val)
+                return [operator, operand]
+            return expression
+
         elif expression[0] == InterpreterBase.CALL_DEF:
-            res, _ = self.__execute_call_statement(expression, parameters)
-            return res
-        
+            return expression[:3] + [self.fold_expression(param) for param in expression[3:]]
+
         elif len(expression) == 3:
             operator, op1, op2 = expression
-            if type(op1) == list:
-                op1 = self.__solve_expression(op1, parameters)
-
-            if type(op2) == list:
-                op2 = self.__solve_expression(op2, parameters)
-            op1 = self.convert_value(op1, parameters)
-            op2 = self.convert_value(op2, parameters)
-            if type(op1) != ObjectDefinition:
-                op1_py_val = op1.get_pythonic_val()
-            if type(op2) != ObjectDefinition:
-                op2_py_val = op2.get_pythonic_val()
-            if (type(op1) == ObjectDefinition or type(op2) == ObjectDefinition) and operator not in ("==", "!="):
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'{operator} not supported between objects')
-
-            if operator == "+":
-                if (op1.type == int and op2.type == int):
-                    return Value(str(op1_py_val + op2_py_val), int)
-                elif (op1.type == str and op2.type == str):
-                    return Value(str(op1_py_val + op2_py_val), str)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'+ operator not supported between {op1.type} and {op2.type}')
-            elif operator == "-":
-                if (op1.type == int and op2.type == int):
-                    return Value(str(op1_py_val - op2_py_val), int)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'- operator not supported between {op1.type} and {op2.type}')
-            elif operator == "*":
-                if (op1.type == int and op2.type == int):
-                    return Value(str(op1_py_val * op2_py_val), int)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'* operator not supported between {op1.type} and {op2.type}')
-
-            elif operator == "/":
-                if (op1.type == int and op2.type == int):
-                    return Value(str(int(op1_py_val / op2_py_val)), int)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'/ operator not supported between {op1.type} and {op2.type}')
-            elif operator == "%":
-                if (op1.type == int and op2.type == int):
-                    return Value(str(op1_py_val % op2_py_val), int)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'% operator not supported between {op1.type} and {op2.type}')
-            elif operator  == ">":
-                if (op1.type == int and op2.type == int) or \
-                (op1.type == str and op2.type == str):
-                    return Value(str(op1_py_val > op2_py_val).lower(), bool)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'> operator not supported between {op1.type} and {op2.type}')
-            elif operator  == "<":
-                if (op1.type == int and op2.type == int) or \
-                (op1.type == str and op2.type == str):
-                    return Value(str(op1_py_val < op2_py_val).lower(), bool)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'> operator not supported between {op1.type} and {op2.type}')
-            elif operator == "<=":
-                if (op1.type == int and op2.type == int) or \
-                (op1.type == str and op2.type == str):
-                    return Value(str(op1_py_val <= op2_py_val).lower(), bool)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'<= operator not supported between {op1.type} and {op2.type}')
-            elif operator == ">=":
-                if (op1.type == int and op2.type == int) or \
-                (op1.type == str and op2.type == str):
-                    return Value(str(op1_py_val >= op2_py_val).lower(), bool)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'>= operator not supported between {op1.type} and {op2.type}')
-            elif operator == "!=":
-                if (type(op1) == ObjectDefinition and (type(op2) == Value and op2.type != None)):
-                    self.interpreter.error(ErrorType.TYPE_ERROR)
-                if (type(op2) == ObjectDefinition and (type(op1) == Value and op1.type != None)):
-                    self.interpreter.error(ErrorType.TYPE_ERROR)
-                if (type(op1) == ObjectDefinition and op2.type == None) or (type(op2) == ObjectDefinition and op1.type == None):
-                    return Value(InterpreterBase.TRUE_DEF, bool)
-                if (op1.type == op2.type):
-                    return Value(str(op1_py_val != op2_py_val).lower(), bool)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'!= operator not supported between {op1.type} and {op2.type}')
-            elif operator == "==":
-                if (type(op1) == ObjectDefinition and (type(op2) == Value and op2.type != None)):
-                    self.interpreter.error(ErrorType.TYPE_ERROR)
-                if (type(op2) == ObjectDefinition and (type(op1) == Value and op1.type != None)):
-                    self.interpreter.error(ErrorType.TYPE_ERROR)
-                if (type(op1) == ObjectDefinition and op2.type == None) or (type(op2) == ObjectDefinition and op1.type == None):
-                    return Value(InterpreterBase.FALSE_DEF, bool)
-                if (op1.type == op2.type):
-                    return Value(str(op1_py_val == op2_py_val).lower(), bool)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'== operator not supported between {op1.type} and {op2.type}')
-            elif operator == "&":
-                if (op1.type == bool and op2.type == bool):
-                    return Value(str(op1_py_val & op2_py_val).lower(), bool)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'& operator not supported between {op1.type} and {op2.type}')
-            elif operator == "|":
-                if (op1.type == bool and op2.type == bool):
-                    return Value(str(op1_py_val | op2_py_val).lower(), bool)
-                self.interpreter.error(ErrorType.TYPE_ERROR, description = f'| operator not supported between {op1.type} and {op2.type}')
-        self.interpreter.error(ErrorType.TYPE_ERROR)
-
-    def __execute_print_statement(self, statement, parameters = {}):
-        args = statement[1:]
-        args = [self.__solve_expression(arg, parameters).val for arg in args]
-        output = "".join(args)
-        self.interpreter.output(output)
-        return Value(str(InterpreterBase.NULL_DEF), None), False
-    
-    def __execute_set_statement(self, statement, parameters):
-        _, var_name, var_val = statement
-        var_val = self.__solve_expression(var_val, parameters)
-        if var_name in parameters:
-            parameters[var_name] = var_val
-            return Value(str(InterpreterBase.NULL_DEF), None), False
-        
-        if var_name in self.fields:
-            self.fields[var_name].value = var_val
-            return Value(str(InterpreterBase.NULL_DEF), None), False
-        
-        self.interpreter.error(ErrorType.NAME_ERROR)
+            left = self.fold_expression(op1)
+            right = self.fold_expression(op2)
+            left_value = constant_value(left)
+            right_value = constant_value(right)
+            if operator in BINARY_OPERATIONS and left_value is not None and right_value is not None:
+                try:
+                    return BINARY_OPERATIONS[operator](FOLDING_INTERPRETER, left_value, right_value)
+                except (NotFoldable, ArithmeticError):
+                    pass
+            return [operator, left, right]
+        return expression
 
+    # returns None for a statement that does nothing and can be dropped
+    def __optimize_statement(self, statement):
+        if type(statement) != list or statement == []:
+            return statement
+        if is_a_print_statement(statement):
+            return statement[:1] + [self.fold_expression(arg) for arg in statement[1:]]
+        elif is_a_set_statement(statement) and len(statement) == 3:
+            return statement[:2] + [self.fold_expression(statement[2])]
+        elif is_a_call_statement(statement):
+            return self.fold_expression(statement)
+        elif is_a_while_statement(statement) and len(statement) == 3:
+            return statement[:1] + [self.fold_expression(statement[1]), self.optimize_statement(statement[2])]
+        elif is_an_if_statement(statement) and len(statement) in (3, 4):
+            return self.__optimize_if_statement(statement)
+        elif is_a_return_statement(statement) and len(statement) == 2:
+            return statement[:1] + [self.fold_expression(statement[1])]
+        elif is_a_begin_statement(statement):
+            return self.__optimize_begin_statement(statement)
+        return statement
 
-    def __execute_call_statement(self, statement, parameters = {}):
-        _, obj, method, *method_params = statement
-        method_params = [self.__solve_expression(param, parameters) for param in method_params]
-        if obj == InterpreterBase.ME_DEF:
-            if method not in self.methods:
-                self.interpreter.error(ErrorType.NAME_ERROR)
-            if len(method_params) != len(self.methods[method].parameters):
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-            method_params = {self.methods[method].parameters[i]: self.convert_value(method_params[i], parameters) for i in range(len(method_params))}
-            res = self.run_method(method, method_params)
-            return res, False
-        elif obj == InterpreterBase.NULL_DEF:
-            self.interpreter.error(ErrorType.FAULT_ERROR)
-        else:
-            if type(obj) == list:
-                obj = self.__solve_expression(obj, parameters)
-                if type(obj) != ObjectDefinition:
-                    self.interpreter.error(ErrorType.TYPE_ERROR)
+    def __optimize_if_statement(self, statement):
+        condition = self.fold_expression(statement[1])
+        branches = [self.optimize_statement(branch) for branch in statement[2:]]
+        value = constant_value(condition)
+        if value is None or value.type != bool:
+            return statement[:1] + [condition] + branches
+        if value.val:
+            return branches[0]
+        if len(branches) == 2:
+            return branches[1]
+        return None
 
-            elif obj not in self.fields:
-                self.interpreter.error(ErrorType.NAME_ERROR)
+    def __optimize_begin_statement(self, statement):
+        substatements = []
+        for substatement in statement[1:]:
+            substatement = self.__optimize_statement(substatement)
+            if substatement is None:
+                continue
+            substatements.append(substatement)
+            if always_returns(substatement):
+                break
+        return statement[:1] + substatements
 
-            else:
-                obj = self.fields[obj].value
-                if type(obj) != ObjectDefinition:
-                    self.interpreter.error(ErrorType.FAULT_ERROR)
-
-
-            if method not in obj.methods:
-                self.interpreter.error(ErrorType.NAME_ERROR)
-
-            if len(method_params) != len(obj.methods[method].parameters):
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-            
-            method_params = {obj.methods[method].parameters[i]: self.convert_value(method_params[i], parameters) for i in range(len(method_params))}
-            res = obj.run_method(method, method_params)
-            return res, False
-
-    def __execute_all_sub_statements_of_begin_statement(self, statement, parameters = {}):
-        sub_statements = statement[1:]
-        exit_flag = False
-        for substatement in sub_statements:
-            res, exit_flag = self.__run_statement(substatement, parameters)
-            if exit_flag:
-                return res, exit_flag
-        return res, exit_flag
-
-    def __execute_return_statement(self, statement, parameters = {}):
-        if len(statement) == 1:
-            return Value(str(InterpreterBase.NULL_DEF), None), True
-        _, expression = statement
-    
-        return_val = self.__solve_expression(expression, parameters)
-        return return_val, True
-    
-    def __execute_if_statement(self, statement, parameters = {}):
-        _, cond_exp, true_exp, *false_exp, = statement
-        cond_res = self.__solve_expression(cond_exp, parameters)
-        if type(cond_res) != Value or cond_res.type != bool:
-            self.interpreter.error(ErrorType.TYPE_ERROR)
-        exit_flag = False
-        if cond_res.get_pythonic_val() == True:
-            res, exit_flag = self.__run_statement(true_exp, parameters)
-            return res, exit_flag
+
+# Walks every method the way the compilers do and reports, with the same
+# ErrorType, each error the compiled code would raise regardless of the values
+# involved: malformed statements and expressions, undefined names, new on an
+# undefined class, and calls on me to a missing method or with the wrong
+# number of arguments. Classes are marked validated so this runs once per table.
+class ProgramValidator:
+    def __init__(self, interpreter, classes):
+        self.interpreter = interpreter
+        self.classes = classes
+
+    def validate(self):
+        for class_def in self.classes.values():
+            if class_def.validated:
+                continue
+            for method in class_def.methods.values():
+                self.class_def = class_def
+                self.parameters = method.parameter_slots
+                if (class_def.name == InterpreterBase.MAIN_CLASS_DEF and method.name == InterpreterBase.MAIN_FUNC_DEF
+                        and method.parameters):
+                    self.__error(ErrorType.NAME_ERROR, method.source, f'{method.name} takes no parameters')
+                self.validate_statement(method.statement)
+            class_def.validated = True
+
+    def validate_statement(self, statement):
+        if type(statement) != list or statement == [] or not has_valid_length(statement):
+            self.__error(ErrorType.SYNTAX_ERROR, statement)
+        if is_a_print_statement(statement):
+            for arg in statement[1:]:
+                self.validate_expression(arg, statement)
+        elif is_an_inputi_statement(statement) or is_an_inputs_statement(statement):
+            self.__validate_assignment(statement[1], statement)
+        elif is_a_set_statement(statement):
+            self.validate_expression(statement[2], statement)
+            self.__validate_assignment(statement[1], statement)
+        elif is_a_call_statement(statement):
+            self.__validate_call_expression(statement, statement)
+        elif is_a_while_statement(statement):
+            if len(statement) != 3:
+                self.__error(ErrorType.TYPE_ERROR, statement)
+            self.validate_expression(statement[1], statement)
+            self.validate_statement(statement[2])
+        elif is_an_if_statement(statement):
+            self.validate_expression(statement[1], statement)
+            for branch in statement[2:]:
+                self.validate_statement(branch)
+        elif is_a_return_statement(statement):
+            if len(statement) == 2:
+                self.validate_expression(statement[1], statement)
+        elif is_a_begin_statement(statement):
+            for substatement in statement[1:]:
+                self.validate_statement(substatement)
         else:
-            if false_exp != []:
-                res, exit_flag = self.__run_statement(false_exp[0], parameters)
-                return res, exit_flag
-            return Value(InterpreterBase.NULL_DEF, None), exit_flag
-            
+            self.__error(ErrorType.SYNTAX_ERROR, statement)
 
-    def __execute_while_statement(self, statement, parameters = {}):
-        if len(statement) != 3:
-            self.interpreter.error(ErrorType.TYPE_ERROR)
-        _, cond_exp, exp = statement
+    # statement is the enclosing statement, used for the error's line number
+    def validate_expression(self, expression, statement):
+        if type(expression) != list:
+            self.__validate_value(expression, statement)
+            return
 
-        cond_res = self.__solve_expression(cond_exp, parameters)
-        if type(cond_res) != Value or cond_res.type != bool:
-            self.interpreter.error(ErrorType.TYPE_ERROR)
-        exit_flag = False
-        res = Value(str(InterpreterBase.NULL_DEF), None)
-        while cond_res.get_pythonic_val() == True and not exit_flag:
-            res, exit_flag = self.__run_statement(exp, parameters)
-            cond_res = self.__solve_expression(cond_exp, parameters)
-            if exit_flag:
-                return res, exit_flag
-            if type(cond_res) != Value or cond_res.type != bool:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-        if type(cond_res) != Value or cond_res.type != bool:
-                self.interpreter.error(ErrorType.TYPE_ERROR)
-        return res, exit_flag
+        if len(expression) == 1:
+            self.validate_expression(expression[0], statement)
+            return
 
+        elif len(expression) == 2:
+            operator, op1 = expression
+            if operator == "!":
+                self.validate_expression(op1, statement)
+                return
+            if operator == InterpreterBase.NEW_DEF and type(op1) != list:
+                if op1 not in self.classes:
+                    self.__error(ErrorType.TYPE_ERROR, statement, f'{op1} is not a class')
+                return
 
-    def __execute_inputi_statement(self, statement, parameters = {}):
-        _, input_field = statement
-        user_input = self.interpreter.get_input()
-        input_val = str(user_input)
-        self.__execute_set_statement([InterpreterBase.SET_DEF, input_field, input_val], parameters)
-        return Value(str(InterpreterBase.NULL_DEF), None), False
+        elif expression[0] == InterpreterBase.CALL_DEF:
+            self.__validate_call_expression(expression, statement)
+            return
 
-    def __execute_inputs_statement(self, statement, parameters = {}):
-        _, input_field = statement
-        user_input = self.interpreter.get_input()
-        input_val = '"' + user_input + '"'
-        self.__execute_set_statement([InterpreterBase.SET_DEF, input_field, input_val], parameters)
-        return Value(str(InterpreterBase.NULL_DEF), None), False
+        elif len(expression) == 3:
+            operator, op1, op2 = expression
+            self.validate_expression(op1, statement)
+            self.validate_expression(op2, statement)
+            if operator not in BINARY_OPERATIONS:
+                self.__error(ErrorType.TYPE_ERROR, statement, f'{operator} is not an operator')
+            return
+        self.__error(ErrorType.TYPE_ERROR, statement)
 
-    def __run_statement(self, statement, parameters = {}):
-        result = Value(str(InterpreterBase.NULL_DEF), None)
+    def __error(self, error_type, statement, description=None):
+        line_num = None
+        if type(statement) == list and statement != []:
+            line_num = getattr(statement[0], 'line_num', None)
+        self.interpreter.error(error_type, description, line_num)
+
+    def __validate_value(self, token, statement):
+        if type(token) == Value or token == InterpreterBase.ME_DEF:
+            return
+        if constant_value(token) is not None or token in self.parameters or token in self.class_def.fields:
+            return
+        if token not in self.classes:
+            self.__error(ErrorType.NAME_ERROR, statement, f'{token} is not defined')
+
+    def __validate_assignment(self, var_name, statement):
+        if var_name not in self.parameters and var_name not in self.class_def.fields:
+            self.__error(ErrorType.NAME_ERROR, statement, f'{var_name} is not defined')
+
+    def __validate_call_expression(self, expression, statement):
+        _, target, method_name, *method_params = expression
+        for param in method_params:
+            self.validate_expression(param, statement)
+        if target == InterpreterBase.NULL_DEF:
+            self.__error(ErrorType.FAULT_ERROR, statement)
+        elif target == InterpreterBase.ME_DEF:
+            methods = self.class_def.methods
+            if method_name not in methods:
+                self.__error(ErrorType.NAME_ERROR, statement, f'{method_name} is not a method')
+            if len(method_params) != len(methods[method_name].parameters):
+                self.__error(ErrorType.TYPE_ERROR, statement, f'wrong number of arguments to {method_name}')
+        elif type(target) == list:
+            self.validate_expression(target, statement)
+        elif target not in self.parameters and target not in self.class_def.fields:
+            self.__error(ErrorType.NAME_ERROR, statement, f'{target} is not defined')
+
+
+# Statements are numbered in the order a compiler first reaches them, which
+# both backends share, so two statements on one line get separate locations.
+def statement_location(class_name, method_name, ordinal, statement):
+    keyword = statement[0] if type(statement) == list and statement != [] else statement
+    return (class_name, method_name, ordinal, getattr(keyword, 'line_num', None), str(keyword))
+
+
+# Compiled statements return None, or the returned Value once a return has run.
+# An instrumented compile also reports calls, statements and loop iterations
+# to interpreter.hooks; its call sites only ever run instrumented bodies.
+class StatementCompiler:
+    def __init__(self, class_def, method, classes, instrumented=False):
+        self.class_def = class_def
+        self.class_name = class_def.name
+        self.method_name = method.name
+        self.classes = classes
+        self.fields = class_def.fields
+        self.parameters = method.parameter_slots
+        self.compact = class_def.compact
+        self.instrumented = instrumented
+        self.locations = []
+
+    def compile_method(self, statement):
+        body = self.compile_statement(statement)
+        if not self.instrumented:
+            return body
+        class_name = self.class_name
+        method_name = self.method_name
+        def run(obj, parameters):
+            hooks = obj.interpreter.hooks
+            hooks.method_called(class_name, method_name)
+            result = body(obj, parameters)
+            hooks.method_returned(class_name, method_name)
+            return result
+        return run
+
+    def compile_statement(self, statement):
+        if not self.instrumented:
+            return self.__compile_statement(statement)
+        location = statement_location(self.class_name, self.method_name, len(self.locations), statement)
+        self.locations.append(location)
+        run = self.__compile_statement(statement)
+        def run_instrumented(obj, parameters):
+            obj.interpreter.hooks.statement_executed(location)
+            return run(obj, parameters)
+        return run_instrumented
+
+    def __compile_statement(self, statement):
+        if not has_valid_length(statement):
+            return self.__compile_error(ErrorType.SYNTAX_ERROR)
         if is_a_print_statement(statement):
-            result, exit_flag = self.__execute_print_statement(statement, parameters)
+            return self.__compile_print_statement(statement)
         elif is_an_inputi_statement(statement):
-            result, exit_flag = self.__execute_inputi_statement(statement, parameters)
+            return self.__compile_inputi_statement(statement)
         elif is_an_inputs_statement(statement):
-            result, exit_flag = self.__execute_inputs_statement(statement, parameters)
+            return self.__compile_inputs_statement(statement)
         elif is_a_set_statement(statement):
-            result, exit_flag = self.__execute_set_statement(statement, parameters)
+            return self.__compile_set_statement(statement)
         elif is_a_call_statement(statement):
-            result, exit_flag = self.__execute_call_statement(statement, parameters)
+            call = self.__compile_call_expression(statement)
+            def run(obj, parameters):
+                call(obj, parameters)
+            return run
         elif is_a_while_statement(statement):
-            result, exit_flag = self.__execute_while_statement(statement, parameters)
+            return self.__compile_while_statement(statement)
         elif is_an_if_statement(statement):
-            result, exit_flag = self.__execute_if_statement(statement, parameters)
+            return self.__compile_if_statement(statement)
         elif is_a_return_statement(statement):
-            result, exit_flag = self.__execute_return_statement(statement, parameters)
+            return self.__compile_return_statement(statement)
         elif is_a_begin_statement(statement):
-            result, exit_flag = self.__execute_all_sub_statements_of_begin_statement(statement, parameters)
-        return result, exit_flag
+            return self.__compile_begin_statement(statement)
+        return self.__compile_error(ErrorType.SYNTAX_ERROR)
+
+    def compile_expression(self, expression):
+        if type(expression) != list:
+            return self.__compile_value(expression)
+
+        if len(expression) == 1:
+            return self.compile_expression(expression[0])
+
+        elif len(expression) == 2:
+            operator, op1 = expression
+            if operator == "!":
+                return self.__compile_not_expression(op1)
+            if operator == InterpreterBase.NEW_DEF and type(op1) != list:
+                return self.__compile_new_expression(op1)
+
+        elif expression[0] == InterpreterBase.CALL_DEF:
+            return self.__compile_call_expression(expression)
+
+        elif len(expression) == 3:
+            return self.__compile_binary_expression(*expression)
+        return self.__compile_error(ErrorType.TYPE_ERROR)
+
+    def __compile_error(self, error_type):
+        def fail(obj, parameters):
+            obj.interpreter.error(error_type)
+        return fail
+
+    def __compile_value(self, token):
+        if type(token) == Value:
+            def evaluate(obj, parameters):
+                return token
+            return evaluate
+        if token == InterpreterBase.ME_DEF:
+            def evaluate(obj, parameters):
+                return obj
+            return evaluate
+        convert_success, value = convert_string_to_native_val(token)
+        if convert_success:
+            def evaluate(obj, parameters):
+                return value
+        elif token in self.parameters:
+            index = self.parameters[token]
+            def evaluate(obj, parameters):
+                return parameters[index]
+        elif token in self.fields and self.compact:
+            index = self.fields[token].index
+            def evaluate(obj, parameters):
+                value = obj[index]
+                if type(value) is int:
+                    return Value(value, int)
+                return value
+        elif token in self.fields:
+            index = self.fields[token].index
+            def evaluate(obj, parameters):
+                return obj[index]
+        elif token in self.classes:
+            class_def = self.classes[token]
+            def evaluate(obj, parameters):
+                return class_def
+        else:
+            def evaluate(obj, parameters):
+                obj.interpreter.error(ErrorType.NAME_ERROR, f'{token} is not defined')
+        return evaluate
+
+    def __compile_assignment(self, var_name):
+        if var_name in self.parameters:
+            index = self.parameters[var_name]
+            def assign(obj, parameters, var_val):
+                parameters[index] = var_val
+        elif var_name in self.fields and self.compact:
+            index = self.fields[var_name].index
+            def assign(obj, parameters, var_val):
+                if type(var_val) is Value and var_val.type is int:
+                    obj[index] = var_val.val
+                else:
+                    obj[index] = var_val
+        elif var_name in self.fields:
+            index = self.fields[var_name].index
+            def assign(obj, parameters, var_val):
+                obj[index] = var_val
+        else:
+            def assign(obj, parameters, var_val):
+                obj.interpreter.error(ErrorType.NAME_ERROR)
+        return assign
+
+    def __compile_not_expression(self, op1):
+        operand = self.compile_expression(op1)
+        def evaluate(obj, parameters):
+            op1 = operand(obj, parameters)
+            if type(op1) != Value or op1.type != bool:
+                obj.interpreter.error(ErrorType.TYPE_ERROR)
+            return bool_value(not op1.val)
+        return evaluate
+
+    def __compile_new_expression(self, class_name):
+        if class_name not in self.classes:
+            return self.__compile_error(ErrorType.TYPE_ERROR)
+        class_def = self.classes[class_name]
+        def evaluate(obj, parameters):
+            return class_def.instantiate_object(obj.interpreter)
+        return evaluate
+
+    def __compile_binary_expression(self, operator, op1, op2):
+        left = self.compile_expression(op1)
+        right = self.compile_expression(op2)
+        if operator not in BINARY_OPERATIONS:
+            def evaluate(obj, parameters):
+                left(obj, parameters)
+                right(obj, parameters)
+                obj.interpreter.error(ErrorType.TYPE_ERROR)
+            return evaluate
+
+        operation = BINARY_OPERATIONS[operator]
+        if operator in ("==", "!="):
+            def evaluate(obj, parameters):
+                return operation(obj.interpreter, left(obj, parameters), right(obj, parameters))
+            return evaluate
+
+        def evaluate(obj, parameters):
+            op1 = left(obj, parameters)
+            op2 = right(obj, parameters)
+            if type(op1) != Value or type(op2) != Value:
+                obj.interpreter.error(ErrorType.TYPE_ERROR, description = f'{operator} not supported between objects')
+            return operation(obj.interpreter, op1, op2)
+        return evaluate
+
+    def __compile_print_statement(self, statement):
+        args = [self.compile_expression(arg) for arg in statement[1:]]
+        def run(obj, parameters):
+            output = "".join([arg(obj, parameters).to_brewin_string() for arg in args])
+            obj.interpreter.output(output)
+        return run
+
+    def __compile_set_statement(self, statement):
+        _, var_name, var_val = statement
+        expression = self.compile_expression(var_val)
+        assign = self.__compile_assignment(var_name)
+        def run(obj, parameters):
+            assign(obj, parameters, expression(obj, parameters))
+        return run
+
+    def __compile_call_expression(self, statement):
+        _, target, method_name, *method_params = statement
+        args = [self.compile_expression(param) for param in method_params]
+
+        if target == InterpreterBase.NULL_DEF:
+            def evaluate(obj, parameters):
+                for arg in args:
+                    arg(obj, parameters)
+                obj.interpreter.error(ErrorType.FAULT_ERROR)
+            return evaluate
+
+        if target == InterpreterBase.ME_DEF:
+            return self.__compile_me_call(method_name, args)
+        elif type(target) == list:
+            receiver_expression = self.compile_expression(target)
+            def find_receiver(obj, parameters):
+                receiver = receiver_expression(obj, parameters)
+                if not isinstance(receiver, ObjectDefinition):
+                    obj.interpreter.error(ErrorType.TYPE_ERROR)
+                return receiver
+        elif target in self.parameters or target in self.fields:
+            receiver_expression = self.__compile_value(target)
+            def find_receiver(obj, parameters):
+                receiver = receiver_expression(obj, parameters)
+                if not isinstance(receiver, ObjectDefinition):
+                    obj.interpreter.error(ErrorType.FAULT_ERROR)
+                return receiver
+        else:
+            def find_receiver(obj, parameters):
+                obj.interpreter.error(ErrorType.NAME_ERROR)
+
+        classes = self.classes
+        instrumented = self.instrumented
+        # inline cache: the method this call site resolved for the last receiver class
+        cached_class = None
+        cached_body = None
+        cached_weight = 0
+        def evaluate(obj, parameters):
+            nonlocal cached_class, cached_body, cached_weight
+            values = [arg(obj, parameters) for arg in args]
+            receiver = find_receiver(obj, parameters)
+            if receiver.class_def is not cached_class:
+                methods = receiver.class_def.methods
+                if method_name not in methods:
+                    obj.interpreter.error(ErrorType.NAME_ERROR)
+                method = methods[method_name]
+                if len(values) != len(method.parameters):
+                    obj.interpreter.error(ErrorType.TYPE_ERROR)
+                cached_class = receiver.class_def
+                cached_body = cached_class.get_body(method, classes, instrumented)
+                cached_weight = method.weight
+            interpreter = obj.interpreter
+            interpreter.fuel -= cached_weight
+            if interpreter.fuel < 0:
+                interpreter.refuel()
+            interpreter.call_depth += 1
+            if interpreter.call_depth > interpreter.call_depth_limit:
+                interpreter.call_depth_exceeded()
+            result = cached_body(receiver, values)
+            interpreter.call_depth -= 1
+            if result is None:
+                return NULL_VALUE
+            return result
+        return evaluate
+
+    # me is always an object of the class being compiled, so the method a call
+    # on me runs, and whether it takes that many arguments, is known already
+    def __compile_me_call(self, method_name, args):
+        methods = self.class_def.methods
+        if method_name not in methods or len(args) != len(methods[method_name].parameters):
+            error_type = ErrorType.NAME_ERROR if method_name not in methods else ErrorType.TYPE_ERROR
+            def evaluate(obj, parameters):
+                for arg in args:
+                    arg(obj, parameters)
+                obj.interpreter.error(error_type)
+            return evaluate
+
+        class_def = self.class_def
+        classes = self.classes
+        method = methods[method_name]
+        instrumented = self.instrumented
+        weight = method.weight
+        body = None
+        def evaluate(obj, parameters):
+            nonlocal body
+            values = [arg(obj, parameters) for arg in args]
+            if body is None:
+                body = class_def.get_body(method, classes, instrumented)
+            interpreter = obj.interpreter
+            interpreter.fuel -= weight
+            if interpreter.fuel < 0:
+                interpreter.refuel()
+            interpreter.call_depth += 1
+            if interpreter.call_depth > interpreter.call_depth_limit:
+                interpreter.call_depth_exceeded()
+            result = body(obj, values)
+            interpreter.call_depth -= 1
+            if result is None:
+                return NULL_VALUE
+            return result
+        return evaluate
+
+    # the first segment is charged along with the begin itself
+    def __compile_begin_statement(self, statement):
+        sub_statements = []
+        for index, segment in enumerate(statement_segments(statement[1:])):
+            if index > 0:
+                sub_statements.append(self.__compile_charge(segment_weight(segment)))
+            sub_statements.extend(self.compile_statement(substatement) for substatement in segment)
+        def run(obj, parameters):
+            for substatement in sub_statements:
+                result = substatement(obj, parameters)
+                if result is not None:
+                    return result
+        return run
+
+    def __compile_return_statement(self, statement):
+        if len(statement) == 1:
+            def run(obj, parameters):
+                return NULL_VALUE
+            return run
+        _, expression = statement
+        return self.compile_expression(expression)
+
+    def __compile_if_statement(self, statement):
+        _, cond_exp, true_exp, *false_exp, = statement
+        condition = self.compile_expression(cond_exp)
+        true_branch = self.compile_statement(true_exp)
+        false_branch = self.compile_statement(false_exp[0]) if false_exp != [] else None
+        true_weight = statement_weight(true_exp)
+        false_weight = statement_weight(false_exp[0]) if false_exp != [] else 0
+        def run(obj, parameters):
+            cond_res = condition(obj, parameters)
+            interpreter = obj.interpreter
+            if type(cond_res) != Value or cond_res.type != bool:
+                interpreter.error(ErrorType.TYPE_ERROR)
+            if cond_res.val:
+                interpreter.fuel -= true_weight
+                if interpreter.fuel < 0:
+                    interpreter.refuel()
+                return true_branch(obj, parameters)
+            if false_branch is not None:
+                interpreter.fuel -= false_weight
+                if interpreter.fuel < 0:
+                    interpreter.refuel()
+                return false_branch(obj, parameters)
+        return run
+
+    def __compile_while_statement(self, statement):
+        if len(statement) != 3:
+            return self.__compile_error(ErrorType.TYPE_ERROR)
+        _, cond_exp, exp = statement
+        # loops are counted under the while statement's own location
+        location = self.locations[-1] if self.instrumented else None
+        condition = self.compile_expression(cond_exp)
+        loop_body = self.compile_statement(exp)
+        weight = statement_weight(exp)
+        if self.instrumented:
+            loop_body = self.__count_iterations(loop_body, location)
+        def run(obj, parameters):
+            interpreter = obj.interpreter
+            while True:
+                cond_res = condition(obj, parameters)
+                if type(cond_res) != Value or cond_res.type != bool:
+                    interpreter.error(ErrorType.TYPE_ERROR)
+                if not cond_res.val:
+                    return None
+                interpreter.fuel -= weight
+                if interpreter.fuel < 0:
+                    interpreter.refuel()
+                result = loop_body(obj, parameters)
+                if result is not None:
+                    return result
+        return run
+
+    def __compile_charge(self, weight):
+        def run(obj, parameters):
+            interpreter = obj.interpreter
+            interpreter.fuel -= weight
+            if interpreter.fuel < 0:
+                interpreter.refuel()
+        return run
+
+    def __count_iterations(self, loop_body, location):
+        def run(obj, parameters):
+            obj.interpreter.hooks.loop_iteration(location)
+            return loop_body(obj, parameters)
+        return run
+
+    def __compile_inputi_statement(self, statement):
+        _, input_field = statement
+        assign = self.__compile_assignment(input_field)
+        def run(obj, parameters):
+            assign(obj, parameters, obj.interpreter.read_int_input())
+        return run
+
+    def __compile_inputs_statement(self, statement):
+        _, input_field = statement
+        assign = self.__compile_assignment(input_field)
+        def run(obj, parameters):
+            assign(obj, parameters, obj.interpreter.read_string_input())
+        return run
     
 program_12 = [
 
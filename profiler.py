@@ -0,0 +1,127 @@
+import json
+import sys
+import time
+from collections import defaultdict
+
+
+# Collectors are told about events while a program runs. Subclass Collector
+# and override the events you need; statements and loops are identified by a
+# (class_name, method_name, ordinal, line, kind) location tuple, where ordinal
+# numbers the statements of a method.
+class Collector:
+    def method_called(self, class_name, method_name):
+        pass
+
+    def method_returned(self, class_name, method_name):
+        pass
+
+    def statement_executed(self, location):
+        pass
+
+    def loop_iteration(self, location):
+        pass
+
+    def object_allocated(self, class_name):
+        pass
+
+
+class CollectorGroup(Collector):
+    def __init__(self, collectors):
+        self.collectors = list(collectors)
+
+    def method_called(self, class_name, method_name):
+        for collector in self.collectors:
+            collector.method_called(class_name, method_name)
+
+    def method_returned(self, class_name, method_name):
+        for collector in self.collectors:
+            collector.method_returned(class_name, method_name)
+
+    def statement_executed(self, location):
+        for collector in self.collectors:
+            collector.statement_executed(location)
+
+    def loop_iteration(self, location):
+        for collector in self.collectors:
+            collector.loop_iteration(location)
+
+    def object_allocated(self, class_name):
+        for collector in self.collectors:
+            collector.object_allocated(class_name)
+
+
+class Profiler(Collector):
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.calls = defaultdict(int)
+        self.cumulative_time = defaultdict(float)
+        self.statements = defaultdict(int)
+        self.loops = defaultdict(int)
+        self.allocations = defaultdict(int)
+        # recursive activations of a method only count the outermost one's time
+        self.active = defaultdict(int)
+        self.started = {}
+
+    def method_called(self, class_name, method_name):
+        key = (class_name, method_name)
+        self.calls[key] += 1
+        if self.active[key] == 0:
+            self.started[key] = self.clock()
+        self.active[key] += 1
+
+    def method_returned(self, class_name, method_name):
+        key = (class_name, method_name)
+        self.active[key] -= 1
+        if self.active[key] == 0:
+            self.cumulative_time[key] += self.clock() - self.started.pop(key)
+
+    def statement_executed(self, location):
+        self.statements[location] += 1
+
+    def loop_iteration(self, location):
+        self.loops[location] += 1
+
+    def object_allocated(self, class_name):
+        self.allocations[class_name] += 1
+
+    def report(self):
+        return {
+            'methods': sorted([
+                {'class': class_name, 'method': method_name, 'calls': calls,
+                 'cumulative_time': self.cumulative_time[(class_name, method_name)]}
+                for (class_name, method_name), calls in self.calls.items()
+            ], key=lambda entry: -entry['cumulative_time']),
+            'statements': self.__location_report(self.statements, 'count'),
+            'loops': self.__location_report(self.loops, 'iterations'),
+            'allocations': dict(self.allocations),
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.report(), indent=indent)
+
+    def __location_report(self, counts, count_name):
+        return sorted([
+            {'class': class_name, 'method': method_name, 'ordinal': ordinal, 'line': line, 'statement': kind,
+             count_name: count}
+            for (class_name, method_name, ordinal, line, kind), count in counts.items()
+        ], key=lambda entry: -entry[count_name])
+
+
+class TraceCollector(Collector):
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.depth = 0
+
+    def method_called(self, class_name, method_name):
+        stream = self.stream if self.stream is not None else sys.stderr
+        stream.write(f'{"  " * self.depth}call {class_name}.{method_name}\n')
+        self.depth += 1
+
+    def method_returned(self, class_name, method_name):
+        self.depth -= 1
+        stream = self.stream if self.stream is not None else sys.stderr
+        stream.write(f'{"  " * self.depth}return {class_name}.{method_name}\n')
+
+    def object_allocated(self, class_name):
+        stream = self.stream if self.stream is not None else sys.stderr
+        stream.write(f'{"  " * self.depth}new {class_name}\n')
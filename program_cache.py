@@ -0,0 +1,76 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+# bump whenever the pickled class table layout changes
+CACHE_FORMAT_VERSION = 2
+
+
+# class tables are pickled as a list because the dict keys are parser tokens
+def pack_classes(classes):
+    return list(classes.values())
+
+def unpack_classes(packed_classes):
+    return {class_def.name: class_def for class_def in packed_classes}
+
+def dump_classes(classes, file):
+    pickle.dump(pack_classes(classes), file, protocol=pickle.HIGHEST_PROTOCOL)
+
+def load_classes(file):
+    return unpack_classes(pickle.load(file))
+
+
+class ProgramCache:
+    def __init__(self, max_entries=64, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, program):
+        return hashlib.sha256("\n".join(program).encode()).hexdigest()
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        classes = self.__read_from_disk(key)
+        if classes is not None:
+            self.__remember(key, classes)
+        return classes
+
+    def put(self, key, classes):
+        self.__remember(key, classes)
+        self.__write_to_disk(key, classes)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __remember(self, key, classes):
+        self.entries[key] = classes
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.v{CACHE_FORMAT_VERSION}.pickle')
+
+    def __read_from_disk(self, key):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self.__path(key), 'rb') as cache_file:
+                return load_classes(cache_file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def __write_to_disk(self, key, classes):
+        if self.cache_dir is None:
+            return
+        path = self.__path(key)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as cache_file:
+            dump_classes(classes, cache_file)
+        os.replace(temp_path, path)
@@ -0,0 +1,43 @@
+# Strings built with + become a StringRope once they reach ROPE_THRESHOLD
+# characters, so building a string piece by piece costs amortised O(1) per
+# piece instead of copying everything built so far. str() joins the pieces
+# when the text is actually needed, for printing or comparing.
+ROPE_THRESHOLD = 1024
+
+
+class StringRope:
+    __slots__ = ('parts', 'count', 'length', 'text')
+
+    def __init__(self, parts, count, length):
+        self.parts = parts
+        self.count = count
+        self.length = length
+        self.text = None
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        if self.text is None:
+            self.text = "".join(self.parts[:self.count])
+        return self.text
+
+    def append(self, text):
+        if self.text is not None:
+            return StringRope([self.text, text], 2, self.length + len(text))
+        # ropes share their parts list with the rope they were appended to; only
+        # the first append past the end of the list may extend it in place
+        parts = self.parts
+        if len(parts) != self.count:
+            parts = parts[:self.count]
+        parts.append(text)
+        return StringRope(parts, self.count + 1, self.length + len(text))
+
+
+def concatenate(left, right):
+    right = str(right)
+    if type(left) == StringRope:
+        return left.append(right)
+    if len(left) + len(right) < ROPE_THRESHOLD:
+        return left + right
+    return StringRope([left, right], 2, len(left) + len(right))
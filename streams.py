@@ -0,0 +1,87 @@
+import sys
+
+
+# Output sinks receive one line per Brewin print through write(); the
+# interpreter calls flush() when a run ends, whether or not it succeeded.
+class UnbufferedSink:
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def write(self, line):
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(line + "\n")
+
+    def flush(self):
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.flush()
+
+
+class BufferedSink:
+    def __init__(self, stream=None, buffer_size=64 * 1024):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.pending = []
+        self.pending_size = 0
+
+    def write(self, line):
+        self.pending.append(line)
+        self.pending_size += len(line) + 1
+        if self.pending_size >= self.buffer_size:
+            self.__write_pending()
+
+    def flush(self):
+        self.__write_pending()
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.flush()
+
+    def __write_pending(self):
+        if not self.pending:
+            return
+        stream = self.stream if self.stream is not None else sys.stdout
+        self.pending.append("")
+        stream.write("\n".join(self.pending))
+        self.pending = []
+        self.pending_size = 0
+
+
+class CollectSink:
+    def __init__(self, target=None):
+        self.target = target if target is not None else []
+        if type(self.target) == list:
+            self.write = self.target.append
+
+    def write(self, line):
+        self.target.write(line + "\n")
+
+    def flush(self):
+        pass
+
+    def get_output(self):
+        if type(self.target) == list:
+            return self.target
+        return self.target.getvalue().splitlines()
+
+
+# Sinks for Interpreter.run_async, whose write and flush are coroutines.
+class AsyncStreamSink:
+    def __init__(self, writer, encoding="utf-8"):
+        self.writer = writer
+        self.encoding = encoding
+
+    async def write(self, line):
+        self.writer.write((line + "\n").encode(self.encoding))
+        await self.writer.drain()
+
+    async def flush(self):
+        await self.writer.drain()
+
+
+class AsyncQueueSink:
+    def __init__(self, queue):
+        self.queue = queue
+
+    async def write(self, line):
+        await self.queue.put(line)
+
+    async def flush(self):
+        pass
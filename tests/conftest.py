@@ -0,0 +1,9 @@
+import importlib.util
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# intbase and bparser ship with the course's test harness, not with this repo
+if importlib.util.find_spec('intbase') is None or importlib.util.find_spec('bparser') is None:
+    collect_ignore_glob = ['test_*.py']
@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from interpreterv1 import Interpreter
+from test_backends import PROGRAMS, lines, run_program
+
+
+class Lines:
+    def __init__(self, lines):
+        self.lines = list(lines)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.lines:
+            raise StopAsyncIteration
+        return self.lines.pop(0) + '\n'
+
+def run_program_async(source, inputs):
+    interpreter = Interpreter(False, program_cache=None)
+    try:
+        asyncio.run(interpreter.run_async(lines(source), Lines(inputs or []), yield_interval=3))
+    except Exception:
+        error_type, _ = interpreter.get_error_type_and_line()
+        assert error_type is not None
+        return interpreter.get_output(), error_type
+    return interpreter.get_output(), None
+
+
+@pytest.mark.parametrize('name', sorted(PROGRAMS))
+def test_async_api_agrees(name):
+    source, inputs = PROGRAMS[name]
+    assert run_program_async(source, inputs) == run_program(source, inputs, backend='tree')
@@ -0,0 +1,135 @@
+import pytest
+from intbase import ErrorType
+
+from interpreterv1 import Interpreter
+
+BACKENDS = Interpreter.BACKENDS
+
+VALID_PROGRAMS = {
+    'fib': ("""
+(class main
+  (method fib (n) (if (< n 2) (return n) (return (+ (call me fib (- n 1)) (call me fib (- n 2))))))
+  (method main () (print (call me fib 15)))
+)""", None),
+    'polymorphism': ("""
+(class square (method sides () (return 4)))
+(class triangle (method sides () (return 3)))
+(class main
+  (field total 0)
+  (field shape null)
+  (method add (s) (set total (+ total (call s sides))))
+  (method main ()
+    (begin
+      (set shape (new square))
+      (call me add shape)
+      (call me add (new triangle))
+      (call me add shape)
+      (print total " " (== shape null) " " (!= shape null))))
+)""", None),
+    'loops_and_strings': ("""
+(class main
+  (field i 0)
+  (field s "")
+  (method main ()
+    (begin
+      (while (< i 5)
+        (begin
+          (set s (+ s "ab"))
+          (if (== (% i 2) 0) (print i " even") (print i " odd"))
+          (set i (+ i 1))))
+      (print s " " (< "a" "b") " " (/ -7 2))
+      (return)
+      (print "unreachable")))
+)""", None),
+    'input': ("""
+(class main
+  (field n 0)
+  (field name "")
+  (method main ()
+    (begin
+      (inputi n)
+      (inputs name)
+      (print name " " (* n 2))))
+)""", ['21', 'brewin']),
+}
+
+INVALID_PROGRAMS = {
+    'undefined_variable': ("""
+(class main (method main () (begin (print "before") (print x))))""", None),
+    'mismatched_operands': ("""
+(class main (method main () (begin (print "before") (print (+ 1 "a")))))""", None),
+    'call_on_null': ("""
+(class main (field p null) (method main () (begin (print "before") (call p foo))))""", None),
+    'unknown_method': ("""
+(class main (method main () (begin (print "before") (call me foo))))""", None),
+    'wrong_argument_count': ("""
+(class main (method f (a) (return a)) (method main () (begin (print "before") (print (call me f)))))""", None),
+    'non_bool_condition': ("""
+(class main (method main () (begin (print "before") (if 1 (print "yes")))))""", None),
+    'missing_input': ("""
+(class main (field n 0) (method main () (begin (print "before") (inputi n))))""", []),
+    'return_with_two_values': ("""
+(class main (method main () (begin (print "before") (return 1 2))))""", None),
+    'inputi_with_two_targets': ("""
+(class main (field x 0) (field y 0) (method main () (begin (print "before") (inputi x y))))""", ['1', '2']),
+    'set_without_value': ("""
+(class main (field x 0) (method main () (begin (print "before") (set x))))""", None),
+    'empty_if': ("""
+(class main (method main () (begin (print "before") (if))))""", None),
+    'call_without_method': ("""
+(class main (method main () (begin (print "before") (call me))))""", None),
+    'empty_statement': ("""
+(class main (method main () (begin (print "before") ())))""", None),
+}
+
+PROGRAMS = {**VALID_PROGRAMS, **INVALID_PROGRAMS}
+
+
+def lines(source):
+    return source.strip().split('\n')
+
+# input goes through an iterator so that running out of it is a TYPE_ERROR
+# rather than a read from stdin
+def run_program(source, inputs, **options):
+    interpreter = Interpreter(False, iter(inputs or []), program_cache=None, **options)
+    try:
+        interpreter.run(lines(source))
+    except Exception:
+        error_type, _ = interpreter.get_error_type_and_line()
+        assert error_type is not None
+        return interpreter.get_output(), error_type
+    return interpreter.get_output(), None
+
+
+@pytest.mark.parametrize('name', sorted(VALID_PROGRAMS))
+def test_valid_programs_agree(name):
+    source, inputs = VALID_PROGRAMS[name]
+    results = {backend: run_program(source, inputs, backend=backend) for backend in BACKENDS}
+    assert results['tree'][1] is None
+    assert results['tree'] == results['vm']
+
+
+@pytest.mark.parametrize('name', sorted(INVALID_PROGRAMS))
+def test_invalid_programs_agree(name):
+    source, inputs = INVALID_PROGRAMS[name]
+    results = {backend: run_program(source, inputs, backend=backend) for backend in BACKENDS}
+    assert results['tree'][1] is not None
+    assert results['tree'] == results['vm']
+    assert results['tree'][0] == ['before']
+
+
+@pytest.mark.parametrize('name', ['return_with_two_values', 'inputi_with_two_targets', 'set_without_value',
+                                  'empty_if', 'call_without_method', 'empty_statement'])
+def test_malformed_statements_are_syntax_errors(name):
+    source, inputs = INVALID_PROGRAMS[name]
+    for backend in BACKENDS:
+        assert run_program(source, inputs, backend=backend)[1] == ErrorType.SYNTAX_ERROR
+
+
+@pytest.mark.parametrize('options', [{'profile': True}, {'compact_heap': True}, {'max_steps': 10 ** 6}])
+@pytest.mark.parametrize('name', sorted(PROGRAMS))
+def test_options_do_not_change_results(name, options):
+    source, inputs = PROGRAMS[name]
+    expected = run_program(source, inputs, backend='tree')
+    for backend in BACKENDS:
+        assert run_program(source, inputs, backend=backend, **options) == expected
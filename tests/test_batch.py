@@ -0,0 +1,47 @@
+import pytest
+from intbase import ErrorType
+
+from batch import compile_classes, execute_classes, run_batch
+from interpreterv1 import Interpreter
+from test_backends import PROGRAMS, lines, run_program
+
+READS_INPUT = """
+(class main
+  (field n 0)
+  (method double (x) (return (* x 2)))
+  (method main () (begin (inputi n) (print (call me double n))))
+)""".strip().split('\n')
+
+
+@pytest.mark.parametrize('inputs', [None, []])
+@pytest.mark.parametrize('max_workers', [0, 2])
+def test_jobs_without_input_fail_with_a_type_error(inputs, max_workers):
+    results = run_batch([READS_INPUT, READS_INPUT], [['4'], inputs], max_workers=max_workers)
+    assert results[0].output == ['8'] and results[0].error_type is None
+    assert results[1].error_type == ErrorType.TYPE_ERROR
+
+
+@pytest.mark.parametrize('options', [{'backend': 'tree'}, {'backend': 'vm'}, {'backend': 'vm', 'profile': True}])
+def test_compile_classes_compiles_every_method(options):
+    classes = Interpreter(False, program_cache=None).load_program(READS_INPUT)
+    compile_classes(classes, options)
+    methods = classes['main'].methods.values()
+    if options['backend'] == 'tree':
+        assert all(method.body is not None for method in methods)
+    elif 'profile' in options:
+        assert all(method.instrumented_code is not None for method in methods)
+    else:
+        assert all(method.code is not None for method in methods)
+    assert execute_classes(classes, ['5'], options).output == ['10']
+
+
+@pytest.mark.parametrize('max_workers', [0, 2])
+@pytest.mark.parametrize('backend', Interpreter.BACKENDS)
+def test_batch_runner_agrees(max_workers, backend):
+    names = sorted(PROGRAMS)
+    programs = [lines(PROGRAMS[name][0]) for name in names]
+    inputs = [PROGRAMS[name][1] for name in names]
+    results = run_batch(programs, inputs, max_workers=max_workers, backend=backend)
+    for name, result in zip(names, results):
+        source, job_inputs = PROGRAMS[name]
+        assert (result.output, result.error_type) == run_program(source, job_inputs, backend='tree'), name
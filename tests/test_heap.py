@@ -0,0 +1,67 @@
+import pytest
+
+from interpreterv1 import HeapLimitError, Interpreter
+
+DOUBLING = """
+(class main
+  (field s "x")
+  (field i 0)
+  (method main ()
+    (begin
+      (while (< i 22)
+        (begin
+          (set s (+ s s))
+          (set i (+ i 1))))
+      (print i)))
+)""".strip().split('\n')
+
+STORES_A_STRING = """
+(class holder
+  (field text "")
+  (method keep (t) (set text t)))
+(class main
+  (field h null)
+  (method main ()
+    (begin
+      (set h (new holder))
+      (call h keep "a string of some length, long enough to matter")
+      (print "done")))
+)""".strip().split('\n')
+
+THREE_INTS = """
+(class point (field x 1) (field y 2) (field z 3) (method get () (return x)))
+(class main (method main () (print (call (new point) get))))
+""".strip().split('\n')
+
+
+def heap_stats(program, backend, **options):
+    interpreter = Interpreter(False, backend=backend, program_cache=None, track_heap=True, **options)
+    interpreter.run(program)
+    return interpreter.get_heap_stats()
+
+
+@pytest.mark.parametrize('backend', Interpreter.BACKENDS)
+def test_string_growth_counts_against_the_cap(backend):
+    interpreter = Interpreter(False, backend=backend, program_cache=None, max_heap=10000)
+    with pytest.raises(HeapLimitError):
+        interpreter.run(DOUBLING)
+    assert interpreter.get_heap_stats()['peak_bytes'] <= 10000
+    assert Interpreter(False, backend=backend, program_cache=None, max_heap=10 ** 7).run(DOUBLING) is None
+
+
+@pytest.mark.parametrize('backend', Interpreter.BACKENDS)
+def test_field_values_are_counted(backend):
+    interpreter = Interpreter(False, backend=backend, program_cache=None, track_heap=True)
+    classes = interpreter.load_program(STORES_A_STRING)
+    interpreter.execute(classes)
+    stats = interpreter.get_heap_stats()
+    growth = stats['classes']['holder']['peak_bytes'] - classes['holder'].object_size
+    assert growth >= len("a string of some length, long enough to matter")
+    assert stats['live_bytes'] == 0
+
+
+@pytest.mark.parametrize('backend', Interpreter.BACKENDS)
+def test_compact_objects_report_fewer_bytes(backend):
+    boxed = heap_stats(THREE_INTS, backend)['classes']['point']['peak_bytes']
+    compact = heap_stats(THREE_INTS, backend, compact_heap=True)['classes']['point']['peak_bytes']
+    assert compact < boxed
@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+from helpers import int_to_string, string_to_int
+
+# longer than the 4300 digits str() and int() accept by default
+DIGITS = 9000
+
+
+def random_digits(count):
+    generator = random.Random(count)
+    return str(generator.randint(1, 9)) + "".join(str(generator.randint(0, 9)) for _ in range(count - 1))
+
+
+@pytest.mark.parametrize('text', [random_digits(DIGITS), "-" + random_digits(DIGITS), "1" + "0" * DIGITS,
+                                  "-1" + "0" * DIGITS, "9" * DIGITS, "1" + "0" * 4000, "1" + "0" * 3999])
+def test_round_trip(text):
+    assert int_to_string(string_to_int(text)) == text
+
+
+def test_leading_plus_sign():
+    text = random_digits(DIGITS)
+    assert string_to_int("+" + text) == string_to_int(text) > 0
+    assert string_to_int("-" + text) == -string_to_int(text)
+
+
+def test_powers_of_ten():
+    assert string_to_int("1" + "0" * DIGITS) == 10 ** DIGITS
+    assert int_to_string(10 ** DIGITS) == "1" + "0" * DIGITS
+    assert int_to_string(-(10 ** DIGITS)) == "-1" + "0" * DIGITS
@@ -0,0 +1,15 @@
+import pytest
+from intbase import ErrorType
+
+from interpreterv1 import Interpreter
+
+MAIN_WITH_PARAMETER = ['(class main (method main (x) (print x)))']
+
+
+@pytest.mark.parametrize('options', [{'backend': 'tree'}, {'backend': 'vm'}, {'validate': True}])
+def test_main_with_parameters_is_a_name_error(options):
+    interpreter = Interpreter(False, program_cache=None, **options)
+    with pytest.raises(Exception):
+        interpreter.run(MAIN_WITH_PARAMETER)
+    assert interpreter.get_error_type_and_line()[0] == ErrorType.NAME_ERROR
+    assert interpreter.get_output() == []
@@ -0,0 +1,85 @@
+import pytest
+
+from interpreterv1 import Interpreter, CallDepthLimitError, StepLimitError, TimeLimitError
+from test_backends import VALID_PROGRAMS, lines
+
+BACKENDS = Interpreter.BACKENDS
+
+BRANCHY_LOOP = """
+(class main
+  (field i 0)
+  (method main ()
+    (while true
+      (if (== i -1)
+        (begin (print 1) (print 2) (print 3) (print 4))
+        (set i (+ i 1)))))
+)"""
+
+STRAIGHT_LINE = "(class main (method main () (begin " + " ".join(f"(print {n})" for n in range(50)) + ")))"
+
+EARLY_RETURNS = """
+(class main
+  (method find (n)
+    (begin
+      (while true
+        (begin
+          (if (== n 7) (return n))
+          (set n (+ n 1))))
+      (print "never")))
+  (method main ()
+    (begin
+      (print (call me find 0))
+      (if (< 1 2) (begin (print "a") (print "b")) (print "c"))))
+)"""
+
+INFINITE_RECURSION = "(class main (method f () (call me f)) (method main () (call me f)))"
+
+PROGRAMS = {**VALID_PROGRAMS, 'early_returns': (EARLY_RETURNS, None)}
+
+
+def run_program(source, inputs=None, **options):
+    interpreter = Interpreter(False, iter(inputs or []), program_cache=None, **options)
+    interpreter.run(lines(source))
+    return interpreter
+
+def statements_executed(source, inputs, backend):
+    profile = run_program(source, inputs, backend=backend, profile=True).get_profile()
+    return sum(entry['count'] for entry in profile['statements'])
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_only_branches_taken_are_charged(backend):
+    interpreter = Interpreter(False, backend=backend, program_cache=None, max_steps=1000)
+    with pytest.raises(StepLimitError):
+        interpreter.run(lines(BRANCHY_LOOP))
+    assert interpreter.steps_used == 1001
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_straight_line_code_is_charged(backend):
+    with pytest.raises(StepLimitError):
+        run_program(STRAIGHT_LINE, backend=backend, max_steps=50)
+    assert len(run_program(STRAIGHT_LINE, backend=backend, max_steps=51).get_output()) == 50
+
+
+# a program may execute exactly as many statements as the profiler counts
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('name', sorted(PROGRAMS))
+def test_step_limit_is_exact(name, backend):
+    source, inputs = PROGRAMS[name]
+    steps = statements_executed(source, inputs, backend)
+    run_program(source, inputs, backend=backend, max_steps=steps)
+    with pytest.raises(StepLimitError):
+        run_program(source, inputs, backend=backend, max_steps=steps - 1)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_time_limit(backend):
+    with pytest.raises(TimeLimitError):
+        run_program(BRANCHY_LOOP, backend=backend, max_time=0.05)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_call_depth_limit(backend):
+    with pytest.raises(CallDepthLimitError):
+        run_program(INFINITE_RECURSION, backend=backend, max_call_depth=50)
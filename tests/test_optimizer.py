@@ -0,0 +1,53 @@
+import pytest
+from intbase import ErrorType
+
+from interpreterv1 import Interpreter, Value
+from test_backends import run_program
+
+
+def program(body):
+    return f'(class main (method main () {body}))'
+
+def main_body(body):
+    classes = Interpreter(False, program_cache=None).load_program([program(body)])
+    return classes['main'].methods['main'].statement
+
+def printed(expression):
+    return program(f'(begin (print "before") (print {expression}))')
+
+
+@pytest.mark.parametrize('expression, value, value_type', [('(+ 1 2)', 3, int), ('(== null null)', True, bool)])
+def test_constant_expressions_are_folded(expression, value, value_type):
+    folded = main_body(f'(print {expression})')[1]
+    assert type(folded) == Value
+    assert (folded.val, folded.type) == (value, value_type)
+
+
+@pytest.mark.parametrize('expression, error_type', [('(+ 1 "a")', ErrorType.TYPE_ERROR),
+                                                    ('(< null null)', ErrorType.TYPE_ERROR)])
+def test_failing_expressions_fail_at_runtime(expression, error_type):
+    assert type(main_body(f'(print {expression})')[1]) == list
+    for backend in Interpreter.BACKENDS:
+        assert run_program(printed(expression), None, backend=backend) == (['before'], error_type)
+
+
+def test_division_by_zero_fails_at_runtime():
+    assert type(main_body('(print (/ 1 0))')[1]) == list
+    for backend in Interpreter.BACKENDS:
+        interpreter = Interpreter(False, backend=backend, program_cache=None)
+        with pytest.raises(ZeroDivisionError):
+            interpreter.run([printed('(/ 1 0)')])
+        assert interpreter.get_output() == ['before']
+
+
+def test_if_false_without_else_is_dropped():
+    assert main_body('(begin (if false (print 1)) (print 2))') == ['begin', ['print', '2']]
+
+
+def test_if_true_becomes_its_first_branch():
+    assert main_body('(if true (print 1) (print 2))') == ['print', '1']
+
+
+def test_statements_after_a_return_are_dropped():
+    assert main_body('(begin (print 1) (if (< 1 x) (return 1) (return 2)) (print 2))') == \
+        ['begin', ['print', '1'], ['if', ['<', '1', 'x'], ['return', '1'], ['return', '2']]]
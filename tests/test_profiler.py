@@ -0,0 +1,42 @@
+import pytest
+
+from interpreterv1 import Interpreter
+
+# two sets on one line, and a loop whose body shares the while's line
+PROGRAM = """
+(class main
+  (field i 0)
+  (field j 0)
+  (method main ()
+    (begin
+      (set i 1) (set j 2)
+      (while (< i 4) (set i (+ i 1)))
+      (if (== i 4) (print i j) (print j i))))
+)""".strip().split('\n')
+
+
+def profile(backend):
+    interpreter = Interpreter(False, backend=backend, program_cache=None, profile=True)
+    interpreter.run(PROGRAM)
+    return interpreter.get_profile()
+
+def counts(entries, count_name):
+    return sorted((entry['ordinal'], entry['line'], entry['statement'], entry[count_name]) for entry in entries)
+
+
+@pytest.mark.parametrize('backend', Interpreter.BACKENDS)
+def test_statements_on_one_line_are_counted_separately(backend):
+    statements = counts(profile(backend)['statements'], 'count')
+    sets = [entry for entry in statements if entry[2] == 'set']
+    assert len(sets) == 3
+    assert sets[0][1] == sets[1][1] and sets[0][0] != sets[1][0]
+    assert [count for _, _, _, count in sets] == [1, 1, 3]
+    assert [kind for _, _, kind, _ in statements] == ['begin', 'set', 'set', 'while', 'set', 'if', 'print']
+
+
+def test_backends_report_the_same_locations():
+    reports = {backend: profile(backend) for backend in Interpreter.BACKENDS}
+    assert counts(reports['tree']['statements'], 'count') == counts(reports['vm']['statements'], 'count')
+    assert counts(reports['tree']['loops'], 'iterations') == counts(reports['vm']['loops'], 'iterations')
+    loop, = counts(reports['vm']['loops'], 'iterations')
+    assert loop[2] == 'while' and loop[3] == 3
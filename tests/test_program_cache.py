@@ -0,0 +1,100 @@
+import pickle
+
+import pytest
+from intbase import ErrorType
+
+from interpreterv1 import Interpreter
+from program_cache import ProgramCache, dump_classes, load_classes
+from test_backends import PROGRAMS, lines, run_program
+
+PROGRAM = """
+(class main
+  (field i 0)
+  (method main ()
+    (begin
+      (while (< i 3)
+        (set i (+ i 1)))
+      (print i)))
+)""".strip().split('\n')
+
+UNDEFINED_NAME = """
+(class main
+  (method main ()
+    (begin
+      (print "hello")
+      (print x)))
+)""".strip().split('\n')
+
+
+def profile_statements(program_cache, backend):
+    interpreter = Interpreter(False, backend=backend, program_cache=program_cache, profile=True)
+    interpreter.run(PROGRAM)
+    return sorted((entry['line'], entry['statement'], entry['count'])
+                  for entry in interpreter.get_profile()['statements'])
+
+def validation_error(program_cache):
+    interpreter = Interpreter(False, program_cache=program_cache, validate=True)
+    with pytest.raises(Exception):
+        interpreter.load_program(UNDEFINED_NAME)
+    return interpreter.get_error_type_and_line()
+
+
+def test_pickling_keeps_line_numbers():
+    classes = Interpreter(False, program_cache=None).load_program(PROGRAM)
+    source = classes['main'].methods['main'].source
+    statement = pickle.loads(pickle.dumps(classes['main'])).methods['main'].source
+    assert statement[0].line_num == source[0].line_num is not None
+    assert statement[1][0].line_num == source[1][0].line_num is not None
+
+
+@pytest.mark.parametrize('backend', Interpreter.BACKENDS)
+def test_profile_lines_survive_the_disk_cache(tmp_path, backend):
+    expected = profile_statements(None, backend)
+    assert None not in [line for line, _, _ in expected]
+    profile_statements(ProgramCache(cache_dir=str(tmp_path)), backend)
+    assert profile_statements(ProgramCache(cache_dir=str(tmp_path)), backend) == expected
+
+
+def test_validation_errors_keep_their_line_after_a_cache_hit(tmp_path):
+    cache = ProgramCache(cache_dir=str(tmp_path))
+    Interpreter(False, program_cache=cache).load_program(UNDEFINED_NAME)
+    expected = validation_error(None)
+    assert expected[0] == ErrorType.NAME_ERROR and expected[1] is not None
+    assert validation_error(ProgramCache(cache_dir=str(tmp_path))) == expected
+
+
+def test_dump_and_load_round_trip(tmp_path):
+    classes = Interpreter(False, program_cache=None).load_program(PROGRAM)
+    with open(tmp_path / 'classes.pickle', 'wb') as cache_file:
+        dump_classes(classes, cache_file)
+    with open(tmp_path / 'classes.pickle', 'rb') as cache_file:
+        loaded = load_classes(cache_file)
+    assert list(loaded) == ['main']
+    assert loaded['main'].methods['main'].source == classes['main'].methods['main'].source
+
+
+@pytest.mark.parametrize('backend', Interpreter.BACKENDS)
+def test_disk_cache_hits_agree(tmp_path, backend):
+    for name, (source, inputs) in sorted(PROGRAMS.items()):
+        expected = run_program(source, inputs, backend=backend)
+        for _ in range(2):
+            # a fresh cache object each time, so the second run loads from disk
+            cache = ProgramCache(cache_dir=str(tmp_path))
+            interpreter = Interpreter(False, iter(inputs or []), backend=backend, program_cache=cache)
+            try:
+                interpreter.run(lines(source))
+                result = interpreter.get_output(), None
+            except Exception:
+                result = interpreter.get_output(), interpreter.get_error_type_and_line()[0]
+            assert result == expected, name
+    assert len(list(tmp_path.iterdir())) == len(PROGRAMS)
+
+
+def test_memory_cache_evicts_the_least_recently_used_table():
+    cache = ProgramCache(max_entries=2)
+    cache.put('a', {})
+    cache.put('b', {})
+    cache.get('a')
+    cache.put('c', {})
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.get('b') is None
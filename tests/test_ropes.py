@@ -0,0 +1,30 @@
+from ropes import ROPE_THRESHOLD, StringRope, concatenate
+
+BASE = "x" * ROPE_THRESHOLD
+
+
+def test_concatenate_builds_a_rope_past_the_threshold():
+    assert concatenate("a", "b") == "ab"
+    rope = concatenate(BASE, "y")
+    assert type(rope) == StringRope
+    assert str(rope) == BASE + "y" and len(rope) == len(BASE) + 1
+
+
+def test_appends_to_the_same_rope_do_not_see_each_other():
+    parent = concatenate(BASE, "a")
+    left = concatenate(parent, "b")
+    right = concatenate(parent, "c")
+    left_child = concatenate(left, "d")
+    right_child = concatenate(right, "e")
+    assert str(parent) == BASE + "a"
+    assert str(left) == BASE + "ab"
+    assert str(right) == BASE + "ac"
+    assert str(left_child) == BASE + "abd"
+    assert str(right_child) == BASE + "ace"
+
+
+def test_appending_after_the_text_was_joined():
+    rope = concatenate(BASE, "a")
+    assert str(rope) == BASE + "a"
+    assert str(concatenate(rope, "b")) == BASE + "ab"
+    assert str(concatenate(rope, "c")) == BASE + "ac"
@@ -0,0 +1,84 @@
+import io
+
+import pytest
+
+from interpreterv1 import Interpreter
+from streams import BufferedSink, CollectSink, UnbufferedSink
+
+PRINTS_THEN_FAILS = """
+(class main
+  (method main ()
+    (begin
+      (print "one")
+      (print "two")
+      (print undefined)))
+)""".strip().split('\n')
+
+
+class RecordingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+        self.flushes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+    def flush(self):
+        self.flushes += 1
+
+
+def test_unbuffered_sink_writes_every_line():
+    stream = RecordingStream()
+    sink = UnbufferedSink(stream)
+    sink.write("a")
+    sink.write("b")
+    assert stream.getvalue() == "a\nb\n"
+    assert stream.writes == 2
+
+
+def test_buffered_sink_holds_lines_until_the_threshold():
+    stream = RecordingStream()
+    sink = BufferedSink(stream, buffer_size=8)
+    sink.write("abc")
+    sink.write("de")
+    assert stream.getvalue() == ""
+    # 4 + 3 + 3 bytes with newlines reaches the 8 byte threshold
+    sink.write("fg")
+    assert stream.getvalue() == "abc\nde\nfg\n"
+    assert stream.writes == 1
+    sink.write("h")
+    sink.flush()
+    assert stream.getvalue() == "abc\nde\nfg\nh\n"
+    assert stream.flushes == 1
+
+
+def test_collect_sink_writes_to_a_text_stream():
+    target = io.StringIO()
+    sink = CollectSink(target)
+    sink.write("first")
+    sink.write("second")
+    assert target.getvalue() == "first\nsecond\n"
+    assert sink.get_output() == ["first", "second"]
+
+
+@pytest.mark.parametrize('backend', Interpreter.BACKENDS)
+def test_sinks_are_flushed_when_a_run_fails(backend):
+    stream = RecordingStream()
+    interpreter = Interpreter(False, backend=backend, program_cache=None,
+                              output_sink=BufferedSink(stream, buffer_size=1024))
+    with pytest.raises(Exception):
+        interpreter.run(PRINTS_THEN_FAILS)
+    assert stream.getvalue() == "one\ntwo\n"
+    assert stream.flushes == 1
+
+
+@pytest.mark.parametrize('backend', Interpreter.BACKENDS)
+def test_collect_sink_receives_a_programs_output(backend):
+    sink = CollectSink()
+    interpreter = Interpreter(False, backend=backend, program_cache=None, output_sink=sink)
+    with pytest.raises(Exception):
+        interpreter.run(PRINTS_THEN_FAILS)
+    assert sink.get_output() == ["one", "two"]
+    assert interpreter.get_output() == []
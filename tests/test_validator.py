@@ -0,0 +1,74 @@
+import pytest
+from intbase import ErrorType
+
+from interpreterv1 import Interpreter
+from test_backends import VALID_PROGRAMS, run_program
+
+# each body sits on line 3 of its program, the line the error must name
+CASES = {
+    'set_without_value': ('(set x)', ErrorType.SYNTAX_ERROR),
+    'set_with_two_values': ('(set x 1 2)', ErrorType.SYNTAX_ERROR),
+    'inputi_without_target': ('(inputi)', ErrorType.SYNTAX_ERROR),
+    'inputi_with_two_targets': ('(inputi x y)', ErrorType.SYNTAX_ERROR),
+    'inputs_with_two_targets': ('(inputs x y)', ErrorType.SYNTAX_ERROR),
+    'empty_if': ('(if)', ErrorType.SYNTAX_ERROR),
+    'if_without_branch': ('(if true)', ErrorType.SYNTAX_ERROR),
+    'if_with_three_branches': ('(if true (print 1) (print 2) (print 3))', ErrorType.SYNTAX_ERROR),
+    'return_with_two_values': ('(return 1 2)', ErrorType.SYNTAX_ERROR),
+    'call_without_method': ('(call me)', ErrorType.SYNTAX_ERROR),
+    'while_without_body': ('(while true)', ErrorType.TYPE_ERROR),
+    'unknown_statement': ('(loop x)', ErrorType.SYNTAX_ERROR),
+    'undefined_variable': ('(print q)', ErrorType.NAME_ERROR),
+    'unknown_class': ('(set x (new nothing))', ErrorType.TYPE_ERROR),
+    'unknown_operator': ('(print (^ 1 2))', ErrorType.TYPE_ERROR),
+    'undefined_call_target': ('(call nobody run)', ErrorType.NAME_ERROR),
+}
+
+
+def program(body):
+    return ['(class main', '  (field x 0) (field y null)', '  (method main () (begin (print "before")',
+            f'    {body})))']
+
+def reference_line():
+    # the parser decides whether lines count from 0 or 1
+    interpreter = Interpreter(False, program_cache=None, validate=True)
+    with pytest.raises(Exception):
+        interpreter.load_program(program('(print z)'))
+    return interpreter.get_error_type_and_line()[1]
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_errors_are_reported_with_their_type_and_line(name):
+    body, error_type = CASES[name]
+    interpreter = Interpreter(False, program_cache=None, validate=True)
+    with pytest.raises(Exception):
+        interpreter.load_program(program(body))
+    line = reference_line()
+    assert line is not None
+    assert interpreter.get_error_type_and_line() == (error_type, line)
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_validation_matches_the_runtime_error(name):
+    body, error_type = CASES[name]
+    for backend in Interpreter.BACKENDS:
+        interpreter = Interpreter(False, iter(()), backend=backend, program_cache=None)
+        with pytest.raises(Exception):
+            interpreter.run(program(body))
+        assert interpreter.get_error_type_and_line()[0] == error_type
+        assert interpreter.get_output() == ['before']
+
+
+def test_empty_statements_are_syntax_errors():
+    interpreter = Interpreter(False, program_cache=None, validate=True)
+    with pytest.raises(Exception):
+        interpreter.load_program(program('()'))
+    assert interpreter.get_error_type_and_line()[0] == ErrorType.SYNTAX_ERROR
+
+
+@pytest.mark.parametrize('name', sorted(VALID_PROGRAMS))
+def test_validation_accepts_valid_programs(name):
+    source, inputs = VALID_PROGRAMS[name]
+    expected = run_program(source, inputs, backend='tree')
+    for backend in Interpreter.BACKENDS:
+        assert run_program(source, inputs, backend=backend, validate=True) == expected
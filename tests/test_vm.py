@@ -0,0 +1,19 @@
+import sys
+
+from interpreterv1 import Interpreter
+
+DEPTH = 150000
+
+COUNT_DOWN = f"""
+(class main
+  (method down (n) (if (== n 0) (return 0) (return (+ 1 (call me down (- n 1))))))
+  (method main () (print (call me down {DEPTH})))
+)""".strip().split('\n')
+
+
+def test_deep_recursion_does_not_use_the_python_stack():
+    recursion_limit = sys.getrecursionlimit()
+    interpreter = Interpreter(False, backend='vm', program_cache=None)
+    interpreter.run(COUNT_DOWN)
+    assert interpreter.get_output() == [str(DEPTH)]
+    assert sys.getrecursionlimit() == recursion_limit < DEPTH
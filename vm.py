@@ -0,0 +1,652 @@
+import asyncio
+import operator as python_operator
+from intbase import InterpreterBase, ErrorType
+from helpers import *
+from interpreterv1 import Value, ObjectDefinition, NULL_VALUE, BINARY_OPERATIONS, bool_value, convert_string_to_native_val, statement_location
+
+# Brewin calls push a frame onto VirtualMachine's own frame list instead of
+# recursing in Python, so recursion depth is bounded by memory alone.
+PUSH_CONST = 0
+LOAD_PARAM = 1
+LOAD_FIELD = 2
+LOAD_ME = 3
+LOAD_NAME = 4
+STORE_PARAM = 5
+STORE_FIELD = 6
+BINARY_OP = 7
+NOT = 8
+NEW = 9
+CALL = 10
+CALL_ME = 11
+RETURN = 12
+RETURN_NULL = 13
+POP = 14
+PRINT = 15
+JUMP = 16
+POP_JUMP_IF_FALSE = 17
+INPUT_INT = 18
+INPUT_STRING = 19
+FAIL = 20
+INT_ARITHMETIC = 21
+INT_COMPARE = 22
+INT_ARITHMETIC_CONST = 23
+INT_COMPARE_CONST = 24
+COMPARE_JUMP_IF_FALSE = 25
+COMPARE_CONST_JUMP_IF_FALSE = 26
+CHARGE = 27
+# emitted only in instrumented code, see BytecodeCompiler
+STATEMENT = 28
+LOOP_ITERATION = 29
+METHOD_ENTRY = 30
+METHOD_EXIT = 31
+# field access for compact classes, see ClassDefinition
+LOAD_COMPACT_FIELD = 32
+STORE_COMPACT_FIELD = 33
+
+OPCODE_NAMES = {value: name for name, value in list(globals().items()) if name.isupper() and type(value) == int}
+
+JUMP_OPCODES = (JUMP, POP_JUMP_IF_FALSE, COMPARE_JUMP_IF_FALSE, COMPARE_CONST_JUMP_IF_FALSE)
+
+# operators with an inline fast path when both operands are ints; anything
+# else falls back to the shared BINARY_OPERATIONS implementation
+INT_ARITHMETIC_OPERATORS = {
+    "+": python_operator.add,
+    "-": python_operator.sub,
+    "*": python_operator.mul,
+    "/": truncating_divide,
+    "%": python_operator.mod,
+}
+
+INT_COMPARE_OPERATORS = {
+    "<": python_operator.lt,
+    ">": python_operator.gt,
+    "<=": python_operator.le,
+    ">=": python_operator.ge,
+    "==": python_operator.eq,
+    "!=": python_operator.ne,
+}
+
+
+def format_constant(value):
+    if value.type == str:
+        return f'"{value.val}"'
+    return value.to_brewin_string()
+
+# plain jumps carry only their target; the others keep it last in a tuple,
+# after the weight a conditional jump charges when it falls through
+def jump_target(op, arg):
+    if op == JUMP:
+        return arg
+    return arg[-1]
+
+def retarget(op, arg, target):
+    if op == JUMP:
+        return target
+    return arg[:-1] + (target,)
+
+def disassemble(code):
+    lines = []
+    for index, (op, arg) in enumerate(code):
+        if op in (INT_ARITHMETIC, INT_COMPARE, BINARY_OP):
+            arg = arg[-1]
+        elif op in (INT_ARITHMETIC_CONST, INT_COMPARE_CONST):
+            arg = f'{arg[2]} {format_constant(arg[3])}'
+        elif op == POP_JUMP_IF_FALSE:
+            arg = f'{arg[1]} (weight {arg[0]})'
+        elif op == COMPARE_JUMP_IF_FALSE:
+            arg = f'{arg[2]} -> {arg[4]} (weight {arg[3]})'
+        elif op == COMPARE_CONST_JUMP_IF_FALSE:
+            arg = f'{arg[2]} {format_constant(arg[3])} -> {arg[5]} (weight {arg[4]})'
+        elif op == PUSH_CONST:
+            arg = format_constant(arg)
+        elif op == CALL:
+            arg = f'{arg[0]}/{arg[1]}'
+        elif op == CALL_ME:
+            arg = f'{arg[0].name}/{arg[1]}'
+        elif op in (NEW, LOAD_NAME):
+            arg = arg.name
+        elif op in (STATEMENT, LOOP_ITERATION):
+            arg = f'#{arg[2]} line {arg[3]} ({arg[4]})'
+        elif op in (METHOD_ENTRY, METHOD_EXIT):
+            arg = f'{arg[0]}.{arg[1]}'
+        lines.append(f'{index:4} {OPCODE_NAMES[op]:<28} {"" if arg is None else arg}')
+    return "\n".join(lines)
+
+
+def fuse_instructions(code, fuse):
+    # fuse(first, second) returns a single replacement instruction or None;
+    # a pair is never fused when its second instruction is a jump target
+    jump_targets = {jump_target(op, arg) for op, arg in code if op in JUMP_OPCODES}
+    new_code = []
+    new_positions = []
+    index = 0
+    while index < len(code):
+        new_positions.append(len(new_code))
+        if index + 1 < len(code) and index + 1 not in jump_targets:
+            fused = fuse(code[index], code[index + 1])
+            if fused is not None:
+                new_positions.append(len(new_code))
+                new_code.append(fused)
+                index += 2
+                continue
+        new_code.append(code[index])
+        index += 1
+    new_positions.append(len(new_code))
+
+    for index, (op, arg) in enumerate(new_code):
+        if op in JUMP_OPCODES:
+            new_code[index] = (op, retarget(op, arg, new_positions[jump_target(op, arg)]))
+    return new_code
+
+
+def fuse_constant_operand(first, second):
+    if first[0] != PUSH_CONST:
+        return None
+    if second[0] == INT_ARITHMETIC:
+        return (INT_ARITHMETIC_CONST, second[1] + (first[1],))
+    if second[0] == INT_COMPARE:
+        return (INT_COMPARE_CONST, second[1] + (first[1],))
+    return None
+
+
+def fuse_compare_and_jump(first, second):
+    if second[0] != POP_JUMP_IF_FALSE:
+        return None
+    if first[0] == INT_COMPARE:
+        return (COMPARE_JUMP_IF_FALSE, first[1] + second[1])
+    if first[0] == INT_COMPARE_CONST:
+        return (COMPARE_CONST_JUMP_IF_FALSE, first[1] + second[1])
+    return None
+
+
+OPTIMIZATION_PASSES = [fuse_constant_operand, fuse_compare_and_jump]
+
+def optimize(code):
+    for fuse in OPTIMIZATION_PASSES:
+        code = fuse_instructions(code, fuse)
+    return code
+
+
+# Instrumented code reports to interpreter.hooks through METHOD_ENTRY before
+# the body, METHOD_EXIT before every return, and STATEMENT / LOOP_ITERATION.
+class BytecodeCompiler:
+    def __init__(self, class_def, method, classes, instrumented=False):
+        self.class_def = class_def
+        self.class_name = class_def.name
+        self.method_name = method.name
+        self.classes = classes
+        self.fields = class_def.fields
+        self.parameters = method.parameter_slots
+        self.compact = class_def.compact
+        self.instrumented = instrumented
+        self.code = []
+        self.locations = []
+
+    def compile_method(self, statement):
+        if self.instrumented:
+            self.__emit(METHOD_ENTRY, (self.class_name, self.method_name))
+        self.compile_statement(statement)
+        self.__emit_return(RETURN_NULL)
+        return optimize(self.code)
+
+    def compile_statement(self, statement):
+        if self.instrumented:
+            self.locations.append(statement_location(self.class_name, self.method_name, len(self.locations), statement))
+            self.__emit(STATEMENT, self.locations[-1])
+        if not has_valid_length(statement):
+            self.__emit(FAIL, ErrorType.SYNTAX_ERROR)
+        elif is_a_print_statement(statement):
+            for arg in statement[1:]:
+                self.compile_expression(arg)
+            self.__emit(PRINT, len(statement) - 1)
+        elif is_an_inputi_statement(statement):
+            self.__emit(INPUT_INT)
+            self.__compile_assignment(statement[1])
+        elif is_an_inputs_statement(statement):
+            self.__emit(INPUT_STRING)
+            self.__compile_assignment(statement[1])
+        elif is_a_set_statement(statement):
+            _, var_name, var_val = statement
+            self.compile_expression(var_val)
+            self.__compile_assignment(var_name)
+        elif is_a_call_statement(statement):
+            self.__compile_call_expression(statement)
+            self.__emit(POP)
+        elif is_a_while_statement(statement):
+            self.__compile_while_statement(statement)
+        elif is_an_if_statement(statement):
+            self.__compile_if_statement(statement)
+        elif is_a_return_statement(statement):
+            if len(statement) == 1:
+                self.__emit_return(RETURN_NULL)
+            else:
+                self.compile_expression(statement[1])
+                self.__emit_return(RETURN)
+        elif is_a_begin_statement(statement):
+            # the first segment is charged along with the begin itself
+            for index, segment in enumerate(statement_segments(statement[1:])):
+                if index > 0:
+                    self.__emit(CHARGE, segment_weight(segment))
+                for substatement in segment:
+                    self.compile_statement(substatement)
+        else:
+            self.__emit(FAIL, ErrorType.SYNTAX_ERROR)
+
+    def compile_expression(self, expression):
+        if type(expression) != list:
+            self.__compile_value(expression)
+            return
+
+        if len(expression) == 1:
+            self.compile_expression(expression[0])
+            return
+
+        elif len(expression) == 2:
+            operator, op1 = expression
+            if operator == "!":
+                self.compile_expression(op1)
+                self.__emit(NOT)
+                return
+            if operator == InterpreterBase.NEW_DEF and type(op1) != list:
+                if op1 in self.classes:
+                    self.__emit(NEW, self.classes[op1])
+                else:
+                    self.__emit(FAIL, ErrorType.TYPE_ERROR)
+                return
+
+        elif expression[0] == InterpreterBase.CALL_DEF:
+            self.__compile_call_expression(expression)
+            return
+
+        elif len(expression) == 3:
+            operator, op1, op2 = expression
+            self.compile_expression(op1)
+            self.compile_expression(op2)
+            if operator in INT_ARITHMETIC_OPERATORS:
+                self.__emit(INT_ARITHMETIC, (INT_ARITHMETIC_OPERATORS[operator], BINARY_OPERATIONS[operator], operator))
+            elif operator in INT_COMPARE_OPERATORS:
+                self.__emit(INT_COMPARE, (INT_COMPARE_OPERATORS[operator], BINARY_OPERATIONS[operator], operator))
+            elif operator in BINARY_OPERATIONS:
+                self.__emit(BINARY_OP, (BINARY_OPERATIONS[operator], operator))
+            else:
+                self.__emit(FAIL, ErrorType.TYPE_ERROR)
+            return
+        self.__emit(FAIL, ErrorType.TYPE_ERROR)
+
+    def __emit(self, op, arg=None):
+        self.code.append((op, arg))
+        return len(self.code) - 1
+
+    def __emit_return(self, op):
+        if self.instrumented:
+            self.__emit(METHOD_EXIT, (self.class_name, self.method_name))
+        self.__emit(op)
+
+    def __patch_jump(self, index):
+        op, arg = self.code[index]
+        self.code[index] = (op, retarget(op, arg, len(self.code)))
+
+    def __compile_value(self, token):
+        if type(token) == Value:
+            self.__emit(PUSH_CONST, token)
+            return
+        if token == InterpreterBase.ME_DEF:
+            self.__emit(LOAD_ME)
+            return
+        convert_success, value = convert_string_to_native_val(token)
+        if convert_success:
+            self.__emit(PUSH_CONST, value)
+        elif token in self.parameters:
+            self.__emit(LOAD_PARAM, self.parameters[token])
+        elif token in self.fields:
+            self.__emit(LOAD_COMPACT_FIELD if self.compact else LOAD_FIELD, self.fields[token].index)
+        elif token in self.classes:
+            self.__emit(LOAD_NAME, self.classes[token])
+        else:
+            self.__emit(FAIL, ErrorType.NAME_ERROR)
+
+    def __compile_assignment(self, var_name):
+        if var_name in self.parameters:
+            self.__emit(STORE_PARAM, self.parameters[var_name])
+        elif var_name in self.fields:
+            self.__emit(STORE_COMPACT_FIELD if self.compact else STORE_FIELD, self.fields[var_name].index)
+        else:
+            self.__emit(FAIL, ErrorType.NAME_ERROR)
+
+    def __compile_call_expression(self, statement):
+        _, target, method_name, *method_params = statement
+        for param in method_params:
+            self.compile_expression(param)
+        if target == InterpreterBase.ME_DEF:
+            self.__compile_me_call(method_name, len(method_params))
+            return
+        # maps each receiver class seen here to its method's code and weight,
+        # so call sites that see several classes don't keep re-resolving
+        call_site = (method_name, len(method_params), {})
+        if target == InterpreterBase.NULL_DEF:
+            self.__emit(FAIL, ErrorType.FAULT_ERROR)
+            return
+        # the receiver is checked by CALL itself, raising error_type if it
+        # isn't an object
+        if type(target) == list:
+            self.compile_expression(target)
+            error_type = ErrorType.TYPE_ERROR
+        elif target in self.parameters or target in self.fields:
+            self.__compile_value(target)
+            error_type = ErrorType.FAULT_ERROR
+        else:
+            self.__emit(FAIL, ErrorType.NAME_ERROR)
+            return
+        self.__emit(CALL, call_site + (error_type,))
+
+    # me is always an object of the class being compiled, so its method is
+    # resolved now; the call site holds that method's code once compiled
+    def __compile_me_call(self, method_name, argc):
+        methods = self.class_def.methods
+        if method_name not in methods:
+            self.__emit(FAIL, ErrorType.NAME_ERROR)
+        elif argc != len(methods[method_name].parameters):
+            self.__emit(FAIL, ErrorType.TYPE_ERROR)
+        else:
+            self.__emit(CALL_ME, (methods[method_name], argc, [None]))
+
+    def __compile_if_statement(self, statement):
+        _, cond_exp, true_exp, *false_exp, = statement
+        self.compile_expression(cond_exp)
+        jump_to_else = self.__emit(POP_JUMP_IF_FALSE, (statement_weight(true_exp), None))
+        self.compile_statement(true_exp)
+        if false_exp == []:
+            self.__patch_jump(jump_to_else)
+            return
+        jump_to_end = self.__emit(JUMP)
+        self.__patch_jump(jump_to_else)
+        self.__emit(CHARGE, statement_weight(false_exp[0]))
+        self.compile_statement(false_exp[0])
+        self.__patch_jump(jump_to_end)
+
+    def __compile_while_statement(self, statement):
+        if len(statement) != 3:
+            self.__emit(FAIL, ErrorType.TYPE_ERROR)
+            return
+        _, cond_exp, exp = statement
+        # loops are counted under the while statement's own location
+        location = self.locations[-1] if self.instrumented else None
+        loop_start = len(self.code)
+        self.compile_expression(cond_exp)
+        jump_to_end = self.__emit(POP_JUMP_IF_FALSE, (statement_weight(exp), None))
+        if self.instrumented:
+            self.__emit(LOOP_ITERATION, location)
+        self.compile_statement(exp)
+        self.__emit(JUMP, loop_start)
+        self.__patch_jump(jump_to_end)
+
+
+# what a cooperative VirtualMachine's steps() yields to whoever drives it
+PAUSE = None
+OUTPUT = 0
+READ_INPUT = 1
+
+
+# A cooperative VirtualMachine suspends steps() whenever the interpreter
+# refuels, and hands every print and input to run_method_async instead of
+# performing it itself; otherwise steps() never yields.
+class VirtualMachine:
+    def __init__(self, interpreter, cooperative=False):
+        self.interpreter = interpreter
+        self.instrumented = interpreter.hooks is not None
+        self.cooperative = cooperative
+
+    def get_code(self, class_def, method):
+        if self.instrumented:
+            if method.instrumented_code is None:
+                method.instrumented_code = BytecodeCompiler(class_def, method, self.interpreter.classes,
+                                                            instrumented=True).compile_method(method.statement)
+            return method.instrumented_code
+        if method.code is None:
+            method.code = BytecodeCompiler(class_def, method, self.interpreter.classes).compile_method(method.statement)
+        return method.code
+
+    def run_method(self, obj, method_name, parameters = []):
+        methods = obj.class_def.methods
+        if method_name not in methods:
+            self.interpreter.error(ErrorType.NAME_ERROR)
+        return self.execute(obj, self.get_code(obj.class_def, methods[method_name]), parameters)
+
+    async def run_method_async(self, obj, method_name, input_stream=None, output_sink=None, parameters = []):
+        methods = obj.class_def.methods
+        if method_name not in methods:
+            self.interpreter.error(ErrorType.NAME_ERROR)
+        steps = self.steps(obj, self.get_code(obj.class_def, methods[method_name]), parameters)
+        reply = None
+        try:
+            while True:
+                request = steps.send(reply)
+                reply = None
+                if request is PAUSE:
+                    await asyncio.sleep(0)
+                elif request[0] == OUTPUT:
+                    if output_sink is None:
+                        self.interpreter.output(request[1])
+                    else:
+                        await output_sink.write(request[1])
+                else:
+                    reply = await self.interpreter.get_input_async(input_stream)
+        except StopIteration as finished:
+            return finished.value
+
+    def binary_operation(self, operation, operator, op1, op2):
+        if operator not in ("==", "!=") and (type(op1) != Value or type(op2) != Value):
+            self.interpreter.error(ErrorType.TYPE_ERROR, description = f'{operator} not supported between objects')
+        return operation(self.interpreter, op1, op2)
+
+    def execute(self, me, code, params):
+        try:
+            next(self.steps(me, code, params))
+        except StopIteration as finished:
+            return finished.value
+
+    def steps(self, me, code, params):
+        interpreter = self.interpreter
+        cooperative = self.cooperative
+        stack = []
+        frames = []
+        pc = 0
+        # the arms are ordered by how often each opcode runs in benchmarks/
+        while True:
+            op, arg = code[pc]
+            pc += 1
+            if op == LOAD_FIELD:
+                stack.append(me[arg])
+            elif op == LOAD_PARAM:
+                stack.append(params[arg])
+            elif op == STORE_FIELD:
+                me[arg] = stack.pop()
+            elif op == INT_ARITHMETIC_CONST:
+                op1 = stack[-1]
+                op2 = arg[3]
+                if type(op1) is Value and op1.type is int and op2.type is int:
+                    stack[-1] = Value(arg[0](op1.val, op2.val), int)
+                else:
+                    stack[-1] = self.binary_operation(arg[1], arg[2], op1, op2)
+            elif op == COMPARE_CONST_JUMP_IF_FALSE:
+                op1 = stack.pop()
+                op2 = arg[3]
+                if type(op1) is Value and op1.type is int and op2.type is int:
+                    taken = arg[0](op1.val, op2.val)
+                else:
+                    taken = self.binary_operation(arg[1], arg[2], op1, op2).val
+                if not taken:
+                    pc = arg[5]
+                else:
+                    interpreter.fuel -= arg[4]
+                    if interpreter.fuel < 0:
+                        interpreter.refuel()
+                        if cooperative:
+                            yield PAUSE
+            elif op == CALL:
+                method_name, argc, cache, error_type = arg
+                receiver = stack.pop()
+                if not isinstance(receiver, ObjectDefinition):
+                    interpreter.error(error_type)
+                target = cache.get(receiver.class_def)
+                if target is None:
+                    methods = receiver.class_def.methods
+                    if method_name not in methods:
+                        interpreter.error(ErrorType.NAME_ERROR)
+                    method = methods[method_name]
+                    if argc != len(method.parameters):
+                        interpreter.error(ErrorType.TYPE_ERROR)
+                    target = cache[receiver.class_def] = (self.get_code(receiver.class_def, method), method.weight)
+                interpreter.fuel -= target[1]
+                if interpreter.fuel < 0:
+                    interpreter.refuel()
+                    if cooperative:
+                        yield PAUSE
+                base = len(stack) - argc
+                frames.append((code, pc, me, params))
+                if len(frames) > interpreter.call_depth_limit:
+                    interpreter.call_depth_exceeded()
+                params = stack[base:]
+                del stack[base:]
+                code = target[0]
+                pc = 0
+                me = receiver
+            elif op == CALL_ME:
+                method, argc, cache = arg
+                if cache[0] is None:
+                    cache[0] = self.get_code(me.class_def, method)
+                interpreter.fuel -= method.weight
+                if interpreter.fuel < 0:
+                    interpreter.refuel()
+                    if cooperative:
+                        yield PAUSE
+                base = len(stack) - argc
+                frames.append((code, pc, me, params))
+                if len(frames) > interpreter.call_depth_limit:
+                    interpreter.call_depth_exceeded()
+                params = stack[base:]
+                del stack[base:]
+                code = cache[0]
+                pc = 0
+            elif op == RETURN:
+                if not frames:
+                    return stack.pop()
+                code, pc, me, params = frames.pop()
+            elif op == RETURN_NULL:
+                if not frames:
+                    return NULL_VALUE
+                stack.append(NULL_VALUE)
+                code, pc, me, params = frames.pop()
+            elif op == POP:
+                stack.pop()
+            elif op == CHARGE:
+                interpreter.fuel -= arg
+                if interpreter.fuel < 0:
+                    interpreter.refuel()
+                    if cooperative:
+                        yield PAUSE
+            elif op == PUSH_CONST:
+                stack.append(arg)
+            elif op == INT_ARITHMETIC:
+                op2 = stack.pop()
+                op1 = stack[-1]
+                if type(op1) is Value and type(op2) is Value and op1.type is int and op2.type is int:
+                    stack[-1] = Value(arg[0](op1.val, op2.val), int)
+                else:
+                    stack[-1] = self.binary_operation(arg[1], arg[2], op1, op2)
+            elif op == COMPARE_JUMP_IF_FALSE:
+                op2 = stack.pop()
+                op1 = stack.pop()
+                if type(op1) is Value and type(op2) is Value and op1.type is int and op2.type is int:
+                    taken = arg[0](op1.val, op2.val)
+                else:
+                    taken = self.binary_operation(arg[1], arg[2], op1, op2).val
+                if not taken:
+                    pc = arg[4]
+                else:
+                    interpreter.fuel -= arg[3]
+                    if interpreter.fuel < 0:
+                        interpreter.refuel()
+                        if cooperative:
+                            yield PAUSE
+            elif op == JUMP:
+                pc = arg
+            elif op == INT_COMPARE_CONST:
+                op1 = stack[-1]
+                op2 = arg[3]
+                if type(op1) is Value and op1.type is int and op2.type is int:
+                    stack[-1] = bool_value(arg[0](op1.val, op2.val))
+                else:
+                    stack[-1] = self.binary_operation(arg[1], arg[2], op1, op2)
+            elif op == INT_COMPARE:
+                op2 = stack.pop()
+                op1 = stack[-1]
+                if type(op1) is Value and type(op2) is Value and op1.type is int and op2.type is int:
+                    stack[-1] = bool_value(arg[0](op1.val, op2.val))
+                else:
+                    stack[-1] = self.binary_operation(arg[1], arg[2], op1, op2)
+            elif op == BINARY_OP:
+                op2 = stack.pop()
+                op1 = stack[-1]
+                if type(op1) != Value or type(op2) != Value:
+                    interpreter.error(ErrorType.TYPE_ERROR, description = f'{arg[1]} not supported between objects')
+                stack[-1] = arg[0](interpreter, op1, op2)
+            elif op == STORE_PARAM:
+                params[arg] = stack.pop()
+            elif op == LOAD_COMPACT_FIELD:
+                value = me[arg]
+                stack.append(Value(value, int) if type(value) is int else value)
+            elif op == STORE_COMPACT_FIELD:
+                value = stack.pop()
+                me[arg] = value.val if type(value) is Value and value.type is int else value
+            elif op == POP_JUMP_IF_FALSE:
+                cond_res = stack.pop()
+                if type(cond_res) != Value or cond_res.type != bool:
+                    interpreter.error(ErrorType.TYPE_ERROR)
+                if not cond_res.val:
+                    pc = arg[1]
+                else:
+                    interpreter.fuel -= arg[0]
+                    if interpreter.fuel < 0:
+                        interpreter.refuel()
+                        if cooperative:
+                            yield PAUSE
+            elif op == LOAD_ME:
+                stack.append(me)
+            elif op == NOT:
+                op1 = stack[-1]
+                if type(op1) != Value or op1.type != bool:
+                    interpreter.error(ErrorType.TYPE_ERROR)
+                stack[-1] = bool_value(not op1.val)
+            elif op == NEW:
+                stack.append(arg.instantiate_object(interpreter))
+            elif op == PRINT:
+                base = len(stack) - arg
+                output = "".join([value.to_brewin_string() for value in stack[base:]])
+                del stack[base:]
+                if cooperative:
+                    yield (OUTPUT, output)
+                else:
+                    interpreter.output(output)
+            elif op == LOAD_NAME:
+                stack.append(arg)
+            elif op == INPUT_INT:
+                if cooperative:
+                    stack.append(interpreter.parse_int_input((yield (READ_INPUT, None))))
+                else:
+                    stack.append(interpreter.read_int_input())
+            elif op == INPUT_STRING:
+                if cooperative:
+                    stack.append(interpreter.parse_string_input((yield (READ_INPUT, None))))
+                else:
+                    stack.append(interpreter.read_string_input())
+            elif op == STATEMENT:
+                interpreter.hooks.statement_executed(arg)
+            elif op == LOOP_ITERATION:
+                interpreter.hooks.loop_iteration(arg)
+            elif op == METHOD_ENTRY:
+                interpreter.hooks.method_called(arg[0], arg[1])
+            elif op == METHOD_EXIT:
+                interpreter.hooks.method_returned(arg[0], arg[1])
+            elif op == FAIL:
+                interpreter.error(arg)